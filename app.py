@@ -1,11 +1,7 @@
 import streamlit as st
-import pandas as pd
-import understatapi
-import altair as alt
 from streamlit_option_menu import option_menu
 
-from demo.demo4 import app as demo4_app
-from demo.demo5 import app as demo5_app
+from demo.warmup import start_warmup
 
 selected = option_menu(
     menu_title=None,
@@ -14,7 +10,13 @@ selected = option_menu(
     orientation="horizontal"
 )
 
+# 描画に使う重いライブラリは、ユーザーが入力している間にバックグラウンドで読み込んでおく
+start_warmup()
+
+# 選択された方のページだけを読み込む
 if selected == "Mobile":
+    from demo.demo4 import app as demo4_app
     demo4_app()
 elif selected == "Desktop":
+    from demo.demo5 import app as demo5_app
     demo5_app()
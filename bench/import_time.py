@@ -0,0 +1,167 @@
+# 起動時に読み込まれるモジュールと読み込み時間を集計するコード(python -X importtime の結果をまとめる)
+# 使い方: python bench/import_time.py --page mobile --budget-ms 50 --render-budget-ms 3000 --pool-render-budget-ms 6000
+# streamlit 本体の読み込みは除き、このアプリが起動時に追加で読み込む時間が予算内か、
+# 重いライブラリが起動時に読み込まれていないかを確認する
+# あわせて、新しいプロセスで最初のユーザーが"スタッツを取得"を押してからシュートマップが表示されるまで
+# (app() の実行中に読み込む shot_map・mplsoccer・PIL などと背景の用意を含む)の時間を計測する
+# 最初の描画は、その場で描画する場合と描画プロセス(起動と背景の用意を含む)で描画する場合の両方を計測する
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# app.py が最初の画面を表示するまでに読み込むもの
+STARTUP = {
+    "mobile": ["streamlit", "streamlit_option_menu", "demo.warmup", "demo.demo4"],
+    "desktop": ["streamlit", "streamlit_option_menu", "demo.warmup", "demo.demo5"],
+}
+
+# streamlit 本体とそれが読み込むもの(アプリ側では減らせない)
+FRAMEWORK = ["streamlit", "streamlit_option_menu"]
+
+# 起動時に読み込まれてはいけない重いライブラリ(使う時かバックグラウンドで読み込む)
+DEFERRED = ["mplsoccer", "understatapi", "scipy", "demo.shot_map", "demo.render_pool", "demo.shot_store"]
+
+# 最初の描画を計測する選手ID(一時ディレクトリに架空のデータを保存しておく)
+PLAYER_ID = "1"
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+# この行より後の読み込みは app() の実行中のもの
+APP_MARKER = "--- app()\n"
+
+# ページを読み込み、選手IDを入力して"スタッツを取得"を押した状態で app() を1回実行する
+# (描画プロセスを使わずその場で描画し、描画に使うライブラリの読み込みも計測に含める)
+FIRST_RENDER = """
+import importlib, json, sys, time
+start = time.perf_counter()
+import streamlit as st
+from streamlit.delta_generator import DeltaGenerator
+app = importlib.import_module(sys.argv[1]).app
+imported = time.perf_counter()
+sys.stderr.write(APP_MARKER)
+
+errors, images = [], []
+show_image = DeltaGenerator.image
+DeltaGenerator.image = lambda self, image, *args, **kwargs: images.append(len(image)) or show_image(self, image, *args, **kwargs)
+DeltaGenerator.button = lambda self, *args, **kwargs: True
+DeltaGenerator.text_input = lambda self, *args, **kwargs: sys.argv[2]
+DeltaGenerator.error = lambda self, body, *args, **kwargs: errors.append(str(body))
+st.button, st.text_input, st.error, st.image = [getattr(st._main, name) for name in ("button", "text_input", "error", "image")]
+app()
+finished = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "app_ms": (finished - imported) * 1000, "errors": errors, "images": images}))
+"""
+
+
+# python -X importtime の出力を (モジュール名, 自身の時間, 累計の時間, 深さ) のリストにする
+def run_importtime(modules):
+    return parse_importtime(run_python("; ".join(f"import {m}" for m in modules)).stderr)
+
+
+def run_python(code, args=(), env=None):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code, *args], cwd=ROOT, capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+    return result
+
+
+def parse_importtime(stderr):
+    rows = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us) / 1000, int(cumulative_us) / 1000, len(indent) // 2))
+    return rows
+
+
+# 空の保存先・画像のキャッシュを用意し、新しいプロセスで最初の描画までの時間を計測する
+# workers: 描画プロセスの数(0 ならその場で描画する)
+# 戻り値: (計測結果, app() の実行中に読み込んだモジュールと累計の時間)
+def run_first_render(page, workers=0):
+    sys.path.insert(0, str(ROOT))
+    from bench.synthetic import synthetic_shots
+    from demo import shot_store
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir = Path(tmp) / "shot_store"
+        shot_store.STORE_DIR = store_dir
+        shot_store.save_player_shots(PLAYER_ID, shot_store.to_shot_table(synthetic_shots(500, player_id=int(PLAYER_ID))))
+        env = dict(os.environ, SHOT_STORE_DIR=str(store_dir), IMAGE_CACHE_DIR=str(Path(tmp) / "image_cache"),
+                   PLAYER_DIRECTORY=str(Path(tmp) / "_players.json"), RENDER_WORKERS=str(workers))
+        result = run_python(f"APP_MARKER = {APP_MARKER!r}\n{FIRST_RENDER}", [STARTUP[page][-1], PLAYER_ID], env)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    # app() の中で読み込むモジュールは、関数の中から読み込むので深さ0で現れる
+    rows = parse_importtime(result.stderr.split(APP_MARKER, 1)[1])
+    lazy = [(name, cumulative) for name, _, cumulative, depth in rows if depth == 0]
+    return report, lazy
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page", choices=list(STARTUP), default="mobile")
+    parser.add_argument("--budget-ms", type=float, default=50, help="streamlit 本体を除いた起動時の読み込み時間の上限")
+    parser.add_argument("--render-budget-ms", type=float, default=3000, help="最初の描画(app() の実行)にかかる時間の上限")
+    parser.add_argument("--pool-render-budget-ms", type=float, default=6000, help="描画プロセスの起動と背景の用意を含めた最初の描画の時間の上限")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    rows = run_importtime(STARTUP[args.page])
+    # インタプリタ自体の起動時に読み込まれるもの(site など)は除く
+    first = next(i for i, (name, _, _, depth) in enumerate(rows) if depth == 0 and name in FRAMEWORK)
+    first = next(i for i in range(first, -1, -1) if i == 0 or rows[i - 1][3] == 0)
+    rows = rows[first:]
+    # 深さ0の行は -c で直接読み込んだモジュールで、累計時間にはそこから読み込まれた全てのモジュールが含まれる
+    top_level = [(name, cumulative) for name, _, cumulative, depth in rows if depth == 0]
+    total = sum(cumulative for _, cumulative in top_level)
+    framework = sum(cumulative for name, cumulative in top_level if name in FRAMEWORK)
+    app = total - framework
+
+    print(f"起動時の読み込み ({args.page}): 合計 {total:.0f} ms  (streamlit {framework:.0f} ms, アプリ {app:.0f} ms)")
+    print("\n直接読み込むモジュール:")
+    for name, cumulative in top_level:
+        print(f"  {cumulative:8.1f} ms  {name}")
+    print("\n読み込み時間の大きいモジュール(自身の時間):")
+    for name, self_ms, _, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"  {self_ms:8.1f} ms  {name}")
+
+    render, lazy = run_first_render(args.page)
+    print(f"\n最初の描画 ({args.page}): ページの読み込み {render['import_ms']:.0f} ms, app() {render['app_ms']:.0f} ms (画像 {sum(render['images'])} バイト)")
+    print("app() の中で読み込むモジュール:")
+    for name, cumulative in sorted(lazy, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"  {cumulative:8.1f} ms  {name}")
+    pool_render, _ = run_first_render(args.page, workers=1)
+    print(f"\n描画プロセスでの最初の描画 ({args.page}): app() {pool_render['app_ms']:.0f} ms (描画プロセスの起動と背景の用意を含む)")
+
+    loaded = {name for name, _, _, _ in rows}
+    deferred = [name for name in DEFERRED if name in loaded]
+    failed = False
+    if deferred:
+        print(f"\n起動時に読み込まれています: {', '.join(deferred)}")
+        failed = True
+    if app > args.budget_ms:
+        print(f"\nアプリの読み込み時間 {app:.0f} ms が予算 {args.budget_ms:.0f} ms を超えました")
+        failed = True
+    for label, result, budget in [("最初の描画", render, args.render_budget_ms), ("描画プロセスでの最初の描画", pool_render, args.pool_render_budget_ms)]:
+        if result["errors"] or not result["images"]:
+            print(f"\n{label}に失敗しました: {' / '.join(result['errors']) or 'シュートマップが表示されていません'}")
+            failed = True
+        elif result["app_ms"] > budget:
+            print(f"\n{label}の時間 {result['app_ms']:.0f} ms が予算 {budget:.0f} ms を超えました")
+            failed = True
+    if failed:
+        sys.exit(1)
+    print(f"\n予算内です (アプリ {app:.0f} ms <= {args.budget_ms:.0f} ms, 最初の描画 {render['app_ms']:.0f} ms <= {args.render_budget_ms:.0f} ms, "
+          f"描画プロセスでの最初の描画 {pool_render['app_ms']:.0f} ms <= {args.pool_render_budget_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
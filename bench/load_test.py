@@ -0,0 +1,118 @@
+# 保存したUnderstatのデータ(tools/record_fixtures.py)を使い、通信なしで複数ユーザーの同時アクセスを再現するコード
+# 使い方:
+#   python tools/record_fixtures.py --synthetic 50
+#   python bench/load_test.py --users 8 --requests 200 --latency-ms 300 --error-rate .02
+# ユーザーごとに選手とシーズンを選び、アプリと同じ流れ(データ取得 → シュートマップ作成)を繰り返して
+# 応答時間の分布とエラー数を表示する(保存データと画像のキャッシュは毎回空の状態から始める)
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=8, help="同時にアクセスするユーザー数")
+    parser.add_argument("--requests", type=int, default=200, help="全ユーザー合計のリクエスト数")
+    parser.add_argument("--compare-share", type=float, default=.2, help="比較モードのリクエストの割合")
+    parser.add_argument("--fixtures", type=Path, help="保存したデータの場所(既定は UNDERSTAT_FIXTURES)")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="結果を保存するJSONファイル")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # 設定はモジュールの読み込み時に決まるため、読み込む前に環境変数を設定する
+    os.environ["UNDERSTAT_SOURCE"] = "replay"
+    os.environ["UNDERSTAT_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["UNDERSTAT_ERROR_RATE"] = str(args.error_rate)
+    os.environ["UNDERSTAT_SEED"] = str(args.seed)
+    if args.fixtures:
+        os.environ["UNDERSTAT_FIXTURES"] = str(args.fixtures)
+    work_dir = tempfile.mkdtemp(prefix="shot_map_load_")
+    os.environ["SHOT_STORE_DIR"] = os.path.join(work_dir, "shot_store")
+    os.environ["IMAGE_CACHE_DIR"] = os.path.join(work_dir, "image_cache")
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from demo.image_cache import memory_cache
+    from demo.shot_data import get_player_shots, player_cache
+    from demo.shot_map import shot_map_image
+    from demo.understat_client import FIXTURE_DIR
+
+    # 選手ごとに、データのあるシーズンを調べておく
+    players = {}
+    for path in sorted((FIXTURE_DIR / "player").glob("*.get_shot_data.json")):
+        shots = json.loads(path.read_text(encoding="utf-8"))
+        seasons = sorted({shot["season"] for shot in shots})
+        if seasons:
+            players[path.name.split(".")[0]] = seasons
+    if not players:
+        sys.exit(f"{FIXTURE_DIR / 'player'} に選手のデータがありません(tools/record_fixtures.py で作成してください)")
+    player_ids = list(players)
+    # 人気のある選手ほど多くアクセスされるようにする
+    weights = 1 / np.arange(1, len(player_ids) + 1)
+    weights /= weights.sum()
+
+    rng = np.random.default_rng(args.seed)
+    plan = []
+    for _ in range(args.requests):
+        chosen = [player_ids[i] for i in rng.choice(len(player_ids), 2, p=weights)]
+        if rng.random() >= args.compare_share:
+            chosen = chosen[:1]
+        plan.append([(player_id, players[player_id][rng.integers(len(players[player_id]))]) for player_id in chosen])
+
+    def request(targets):
+        start = time.perf_counter()
+        try:
+            panels = []
+            for player_id, season in targets:
+                df = get_player_shots(player_id, season)
+                panels.append((df, df["player"].iloc[0], season))
+            shot_map_image("single" if len(panels) == 1 else "compare", panels)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, type(e).__name__
+
+    print(f"選手 {len(player_ids)} 人 / ユーザー {args.users} 人 / {args.requests} リクエスト (遅延 {args.latency_ms} ms, エラー率 {args.error_rate})")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        done = list(pool.map(request, plan))
+    elapsed = time.perf_counter() - start
+
+    from demo import render_pool
+    render_pool.shutdown()
+
+    latencies = np.array([seconds for seconds, error in done if error is None]) * 1000
+    errors = Counter(error for _, error in done if error is not None)
+    report = {
+        "settings": vars(args) | {"fixtures": str(FIXTURE_DIR), "json": None},
+        "elapsed_s": elapsed,
+        "requests_per_s": len(done) / elapsed,
+        "ok": int(latencies.size),
+        "errors": dict(errors),
+        "latency_ms": {name: float(np.percentile(latencies, q)) for name, q in [("p50", 50), ("p90", 90), ("p99", 99), ("max", 100)]} if latencies.size else {},
+        "player_cache": player_cache.stats(),
+        "image_cache": memory_cache.stats(),
+    }
+    print(f"{elapsed:.1f} 秒 ({report['requests_per_s']:.1f} リクエスト/秒)  成功 {report['ok']}  失敗 {sum(errors.values())} {dict(errors)}")
+    if latencies.size:
+        print("応答時間(ms): " + "  ".join(f"{name} {ms:.0f}" for name, ms in report["latency_ms"].items()))
+    print(f"選手データのキャッシュ: ヒット率 {report['player_cache']['hit_rate']:.0%} / 画像のキャッシュ: ヒット率 {report['image_cache']['hit_rate']:.0%}")
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# シュートマップ作成の各段階の処理時間を計測するコード
+# 使い方:
+#   python bench/pipeline.py --sizes 10 1000 100000 --json results.json
+#   python bench/pipeline.py --save-baseline          # 今の結果を基準として保存
+#   python bench/pipeline.py                          # 基準より遅くなった段階があれば終了コード 1
+# 段階: DataFrameの作成 → 型の変換 → シーズンの絞り込み → 集計 → 端末ごとに 図の作成 → 画像への変換
+# 画像への変換はアプリと同じ render_image() で、端末ごとの形式・解像度(RENDER_PROFILES)で行う
+# (SVGを用意する端末は、ベクター形式の図の作成とSVGへの変換も svg_{端末} として計測する)
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import matplotlib
+matplotlib.use("Agg")
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.synthetic import synthetic_shots
+from demo.shot_map import RENDER_PROFILES, draw_shot_map, get_layout, render_image, shot_stats
+from demo.shot_table import to_shot_table
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+SEASON = "2024"
+
+
+# 1回分の処理を段階ごとに計測する(秒)
+def run_once(records, layout, profiles):
+    timings = {}
+
+    start = time.perf_counter()
+    df = pd.DataFrame(records)
+    timings["construct"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df = to_shot_table(df)
+    timings["transform"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df_season = df[df["season"] == SEASON].reset_index(drop=True)
+    timings["filter"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    shot_stats(df_season)
+    timings["stats"] = time.perf_counter() - start
+
+    players = [(df_season, "Player", SEASON)] * len(get_layout(layout)["panels"])
+    for profile in profiles:
+        start = time.perf_counter()
+        fig = draw_shot_map(layout, players, profile)
+        timings[f"draw_{profile}"] = time.perf_counter() - start
+
+        # ラスタライズと画像への変換(render_image は変換後に図を解放する)
+        start = time.perf_counter()
+        render_image(fig, RENDER_PROFILES[profile]["format"])
+        timings[f"encode_{profile}"] = time.perf_counter() - start
+
+        if RENDER_PROFILES[profile]["svg"]:
+            start = time.perf_counter()
+            render_image(draw_shot_map(layout, players, profile, vector=True), "svg")
+            timings[f"svg_{profile}"] = time.perf_counter() - start
+    return timings
+
+
+def run(sizes, repeat, layout, profiles, log=print):
+    # 背景の用意などの初回だけの処理は計測しない
+    run_once(synthetic_shots(10), layout, profiles)
+    results = {}
+    for n in sizes:
+        records = synthetic_shots(n)
+        samples = [run_once(records, layout, profiles) for _ in range(repeat)]
+        results[str(n)] = {stage: statistics.median(s[stage] for s in samples) * 1000 for stage in samples[0]}
+        results[str(n)]["total"] = sum(results[str(n)].values())
+        log(f"{n:>7} 本  " + "  ".join(f"{stage} {ms:8.2f}" for stage, ms in results[str(n)].items()))
+    return results
+
+
+# 基準より tolerance の割合以上、かつ min_ms 以上遅くなった段階を返す
+def find_regressions(results, baseline, tolerance, min_ms):
+    regressions = []
+    for n, stages in results.items():
+        for stage, ms in stages.items():
+            base = baseline.get(n, {}).get(stage)
+            if base is not None and ms > base * (1 + tolerance) and ms - base > min_ms:
+                regressions.append({"shots": int(n), "stage": stage, "baseline_ms": base, "ms": ms, "ratio": ms / base})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--layout", default="single", help="single, compare, grid_{選手数}_{列数}")
+    parser.add_argument("--profiles", nargs="+", choices=list(RENDER_PROFILES), default=list(RENDER_PROFILES))
+    parser.add_argument("--json", type=Path, help="結果を保存するJSONファイル")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="今回の結果を基準として保存する")
+    parser.add_argument("--tolerance", type=float, default=.2, help="基準からこの割合以上遅くなったら遅延とみなす")
+    parser.add_argument("--min-ms", type=float, default=2, help="これ以下の差は誤差とみなす")
+    args = parser.parse_args()
+
+    print("段階ごとの処理時間の中央値(ms)")
+    results = run(args.sizes, args.repeat, args.layout, args.profiles)
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.processor()},
+        "settings": {"layout": args.layout, "profiles": args.profiles, "repeat": args.repeat},
+        "results_ms": results,
+        "regressions": [],
+    }
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"基準を保存しました: {args.baseline}")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline["settings"] != report["settings"]:
+            print("基準と計測条件が違うため比較しません")
+        else:
+            report["regressions"] = find_regressions(results, baseline["results_ms"], args.tolerance, args.min_ms)
+            for r in report["regressions"]:
+                print(f"遅くなっています: {r['shots']} 本 {r['stage']} {r['baseline_ms']:.2f} ms -> {r['ms']:.2f} ms ({r['ratio']:.2f} 倍)")
+            if not report["regressions"]:
+                print("基準より遅くなった段階はありません")
+    else:
+        print(f"基準がありません(--save-baseline で {args.baseline} に保存できます)")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    if report["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
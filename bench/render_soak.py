@@ -0,0 +1,68 @@
+# シュートマップを繰り返し描画し、メモリ使用量が増え続けないことを確認するコード
+# 使い方: python bench/render_soak.py --renders 2000 --layout compare
+
+import argparse
+import gc
+import sys
+import time
+from pathlib import Path
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from demo.shot_map import RENDER_PROFILES, draw_shot_map, get_layout, render_image
+
+
+# 現在の常駐メモリ(MB)
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * 4096 / 1024 / 1024
+
+
+def random_shots(rng, n):
+    return pd.DataFrame({
+        "X": rng.uniform(70, 100, n),
+        "Y": rng.uniform(0, 100, n),
+        "xG": rng.beta(1, 8, n),
+        "result": np.where(rng.random(n) < .12, "Goal", "MissedShots"),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--renders", type=int, default=2000)
+    parser.add_argument("--layout", default="single", help="single, compare, grid_{選手数}_{列数}")
+    parser.add_argument("--profile", default="desktop")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--max-growth-mb", type=float, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    panels = len(get_layout(args.layout)["panels"])
+    samples = []
+    start = time.perf_counter()
+    for i in range(1, args.renders + 1):
+        players = [(random_shots(rng, int(rng.integers(50, 200))), f"Player {i}", "2024") for _ in range(panels)]
+        render_image(draw_shot_map(args.layout, players, args.profile), RENDER_PROFILES[args.profile]["format"])
+        if i > args.warmup and i % 10 == 0:
+            gc.collect()
+            samples.append(rss_mb())
+        if i % 100 == 0:
+            print(f"{i:6d} renders  rss {rss_mb():8.1f} MB  {(time.perf_counter() - start) / i * 1000:6.1f} ms/render")
+
+    # 1回ごとの値はメモリアロケータの都合で上下するため、前半と後半の1/4ずつの平均で比べる
+    quarter = max(len(samples) // 4, 1)
+    growth = np.mean(samples[-quarter:]) - np.mean(samples[:quarter])
+    print(f"warmup後からの増加: {growth:.1f} MB")
+    if growth > args.max_growth_mb:
+        print(f"メモリの増加が上限 {args.max_growth_mb} MB を超えました")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
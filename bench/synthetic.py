@@ -0,0 +1,57 @@
+# ベンチマーク用の架空のシュートデータを作るコード
+# Understatの get_shot_data() と同じ形(全ての値が文字列の辞書のリスト)で返す
+
+import numpy as np
+
+SEASONS = [str(y) for y in range(2014, 2025)]
+
+SITUATIONS = ["OpenPlay", "FromCorner", "SetPiece", "DirectFreekick", "Penalty"]
+SITUATION_P = [.76, .12, .05, .04, .03]
+
+SHOT_TYPES = ["RightFoot", "LeftFoot", "Head"]
+SHOT_TYPE_P = [.55, .3, .15]
+
+MISSES = ["MissedShots", "SavedShot", "BlockedShot", "ShotOnPost"]
+MISS_P = [.4, .33, .25, .02]
+
+LAST_ACTIONS = ["Pass", "Cross", "None", "TakeOn", "Rebound", "Aerial", "Chipped", "Throughball", "Standard"]
+LAST_ACTION_P = [.35, .15, .12, .1, .08, .07, .05, .05, .03]
+
+
+# n 本のシュートを作る(約半分を season のシーズンにし、残りは他のシーズンに分ける)
+def synthetic_shots(n, season="2024", player_id=1, seed=0):
+    rng = np.random.default_rng(seed)
+    situation = rng.choice(SITUATIONS, n, p=SITUATION_P)
+    penalty = situation == "Penalty"
+
+    # ゴールからの距離はペナルティエリア内が多く、遠いほど少ない
+    x = np.clip(1 - rng.gamma(2.2, .055, n), .5, .995)
+    y = np.clip(rng.normal(.5, .12, n), .02, .98)
+    x[penalty], y[penalty] = .885, .5
+
+    # 距離と角度から xG を決め、xG の確率でゴールにする
+    distance = np.hypot((1 - x) * 105, (y - .5) * 68)
+    xg = 1 / (1 + np.exp(.16 * distance - 1.2)) * rng.uniform(.6, 1.2, n)
+    xg = np.clip(xg, .005, .95)
+    xg[penalty] = .7612688541412354
+    goal = rng.random(n) < xg
+    result = np.where(goal, "Goal", rng.choice(MISSES, n, p=MISS_P))
+
+    other_seasons = [s for s in SEASONS if s != season]
+    seasons = np.where(rng.random(n) < .5, season, rng.choice(other_seasons, n))
+    shot_type = rng.choice(SHOT_TYPES, n, p=SHOT_TYPE_P)
+    last_action = rng.choice(LAST_ACTIONS, n, p=LAST_ACTION_P)
+    minute = rng.integers(1, 96, n)
+    match_id = np.sort(rng.integers(1000, 1000 + max(n // 3, 1), n))
+
+    return [
+        {
+            "id": str(300000 + i), "minute": str(minute[i]), "result": result[i],
+            "X": f"{x[i]:.3f}", "Y": f"{y[i]:.3f}", "xG": repr(float(xg[i])),
+            "player": f"Player {player_id}", "h_a": "h" if i % 2 else "a", "player_id": str(player_id),
+            "situation": situation[i], "season": seasons[i], "shotType": shot_type[i], "match_id": str(match_id[i]),
+            "h_team": "Home", "a_team": "Away", "h_goals": "1", "a_goals": "1", "date": "2024-09-01 15:00:00",
+            "player_assisted": None, "lastAction": last_action[i],
+        }
+        for i in range(n)
+    ]
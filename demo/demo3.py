@@ -2,10 +2,12 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import understatapi
 from mplsoccer import VerticalPitch
 import io
+from concurrent.futures import ThreadPoolExecutor
 from matplotlib import font_manager
 
 background_color = "#0C0D0E"
@@ -36,31 +38,37 @@ season2 = st.sidebar.selectbox("シーズン（選手2）", [str(y) for y in ran
 uploaded_file1 = st.sidebar.file_uploader("選手1のCSVアップロード", type="csv", key="file1")
 uploaded_file2 = st.sidebar.file_uploader("選手2のCSVアップロード", type="csv", key="file2")
 
+# 1選手分のデータを読み込む(CSVがアップロードされていればそちらを優先)
+def load_player(uploaded_file, player_id, season, default_name):
+    if uploaded_file:
+        df = pd.read_csv(uploaded_file)
+        name = df["player"].iloc[0] if "player" in df.columns else default_name
+        season = df["season"].iloc[0] if "season" in df.columns else "Unknown"
+    else:
+        # requests.Session はスレッド間で共有しないようスレッドごとにクライアントを作成
+        with understatapi.UnderstatClient() as client:
+            data = client.player(player=player_id).get_shot_data()
+        df = pd.DataFrame(data)
+        df = df[df["season"] == season].reset_index(drop=True)
+        name = df["player"].iloc[0] if not df.empty else default_name
+    return df, name, season
+
 if st.sidebar.button("スタッツを比較"):
     try:
-        client = understatapi.UnderstatClient()
-
-        # Player 1
-        if uploaded_file1:
-            df1 = pd.read_csv(uploaded_file1)
-            name1 = df1["player"].iloc[0] if "player" in df1.columns else "Player1"
-            season1 = df1["season"].iloc[0] if "season" in df1.columns else "Unknown"
-        else:
-            data1 = client.player(player=player1_id).get_shot_data()
-            df1 = pd.DataFrame(data1)
-            df1 = df1[df1["season"] == season1]
-            name1 = df1["player"].iloc[0] if not df1.empty else "Player1"
-
-        # Player 2
-        if uploaded_file2:
-            df2 = pd.read_csv(uploaded_file2)
-            name2 = df2["player"].iloc[0] if "player" in df2.columns else "Player2"
-            season2 = df2["season"].iloc[0] if "season" in df2.columns else "Unknown"
-        else:
-            data2 = client.player(player=player2_id).get_shot_data()
-            df2 = pd.DataFrame(data2)
-            df2 = df2[df2["season"] == season2]
-            name2 = df2["player"].iloc[0] if not df2.empty else "Player2"
+        # 2選手分のデータを並列に取得
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            future1 = pool.submit(load_player, uploaded_file1, player1_id, season1, "Player1")
+            future2 = pool.submit(load_player, uploaded_file2, player2_id, season2, "Player2")
+
+        errors = [(i, future.exception()) for i, future in enumerate([future1, future2], 1)]
+        for i, error in errors:
+            if error is not None:
+                st.error(f"選手{i}のスタッツの取得に失敗しました: {error}")
+        if any(error is not None for _, error in errors):
+            st.stop()
+
+        df1, name1, season1 = future1.result()
+        df2, name2, season2 = future2.result()
 
         df1["X"] = df1["X"].astype(float) * 100
         df1["Y"] = df1["Y"].astype(float) * 100
@@ -136,8 +144,9 @@ if st.sidebar.button("スタッツを比較"):
         ax_stats1.text(.7, 4, 'xG/Shot', fontsize=20, fontname='Roboto', fontweight='bold', color='white', ha='left')
         ax_stats1.text(.73, 3.5, f'{xG_per_shot_1:.2f}', fontsize=16, fontname='Roboto', color='red', ha='left')
 
-        for shot in df1.to_dict(orient='records'):
-            pitch.scatter(shot['X'], shot['Y'], s=300 * shot['xG'], color='red' if shot['result'] == 'Goal' else background_color, ax=ax_pitch1, alpha=0.7, linewidth=0.8, edgecolor='white')
+        # 全シュートを1回のscatterでまとめて描画
+        shot_colors = np.where(df1['result'].to_numpy() == 'Goal', 'red', background_color)
+        pitch.scatter(df1['X'].to_numpy(), df1['Y'].to_numpy(), s=300 * df1['xG'].to_numpy(), c=shot_colors, ax=ax_pitch1, alpha=0.7, linewidth=0.8, edgecolor='white')
 
         # 下側のプレイヤー（player2）
         ax_title2 = fig.add_axes([0, -0.35, 1, 0.2])
@@ -185,17 +194,23 @@ if st.sidebar.button("スタッツを比較"):
         ax_stats2.text(.7, 3, 'xG/Shot', fontsize=20, fontname='Roboto', fontweight='bold', color='white', ha='left')
         ax_stats2.text(.73, 2.5, f'{xG_per_shot_2:.2f}', fontsize=16, fontname='Roboto', color='red', ha='left')
 
-        for shot in df2.to_dict(orient='records'):
-            pitch.scatter(shot['X'], shot['Y'], s=300 * shot['xG'], color='red' if shot['result'] == 'Goal' else background_color, ax=ax_pitch2, alpha=0.7, linewidth=0.8, edgecolor='white')
+        # 全シュートを1回のscatterでまとめて描画
+        shot_colors = np.where(df2['result'].to_numpy() == 'Goal', 'red', background_color)
+        pitch.scatter(df2['X'].to_numpy(), df2['Y'].to_numpy(), s=300 * df2['xG'].to_numpy(), c=shot_colors, ax=ax_pitch2, alpha=0.7, linewidth=0.8, edgecolor='white')
 
         ax_pitch2.invert_yaxis()
 
+        # 1回だけPNGに変換し、表示とダウンロードに同じ画像を使う(図はすぐに閉じる)
         buf = io.BytesIO()
-        st.pyplot(fig)
-        fig.savefig(buf, format="png", bbox_inches="tight", facecolor=fig.get_facecolor())
+        try:
+            fig.savefig(buf, format="png", bbox_inches="tight", dpi=200, facecolor=fig.get_facecolor())
+        finally:
+            plt.close(fig)
+        png = buf.getvalue()
+        st.image(png, use_column_width=True)
         st.download_button(
             label="画像をダウンロード",
-            data=buf.getvalue(),
+            data=png,
             file_name=f"{name1.replace(' ', '_')}_{season1}_vs_{name2.replace(' ', '_')}_{season2}.png",
             mime="image/png"
         )
@@ -5,24 +5,13 @@ import streamlit as st
 def app():
 
     st.markdown("[Understatのサイトはこちら](https://understat.com/)")
-    mode = st.radio("モードを選択", ["スタッツの取得", "スタッツの比較", "CSVファイルとして保存"], horizontal=True)
+    mode = st.radio("モードを選択", ["スタッツの取得", "スタッツの比較", "キャリアのスタッツ", "ランキング", "CSVファイルとして保存", "まとめて保存"], horizontal=True)
 
     if mode == "スタッツの取得":
-        import pandas as pd
-        import matplotlib.pyplot as plt
-        import understatapi
-        from mplsoccer import VerticalPitch
-        import io
-    
-        # スタイル設定
-        background_color = "#0C0D0E"
-    
-        from pathlib import Path
-        from matplotlib import font_manager
-
-        font_path = Path(__file__).parent / "fonts" / "NotoSansJP-Regular.otf"
-        font_prop = font_manager.FontProperties(fname=str(font_path))
-
+        from demo.player_directory import player_id_input
+        from demo.shot_data import get_player_shots, get_uploaded_shots
+        from demo.shot_map import LABELS, shot_map_image
+        from demo.timing import finish_request, start_request, timed
     
         # タイトルと説明
         st.title("シュートマップ作成")
@@ -33,9 +22,9 @@ def app():
 
         with st.expander("ツールの使い方"):
             st.markdown("""
-                1.**選手IDの取得**: サイドバーにある"Understatのサイトはこちら"からUnderstatに飛び、スタッツを取得したい選手の名前をサイト内で検索。検索後URLの末尾にある数字のみをコピーし選手IDを取得。
+                1.**選手の検索**: "選手名または選手IDを入力"に選手の名前(英語、途中まででも可)を入力し、"候補から選手を選択"から選手を選んでください。候補に出てこない選手は、サイドバーにある"Understatのサイトはこちら"からUnderstatに飛び、スタッツを取得したい選手の名前をサイト内で検索。検索後URLの末尾にある数字のみをコピーし選手IDを取得。
 
-                2.**入力フォームの入力**: ID取得後元のページに戻り入力フォームの内容を埋めてください。"選手IDを入力"に先ほどコピーしたIDをペーストし、"シーズンを選択"から特定のシーズンを選択してください。もしCSVからシュートマップを作成する場合、モードの"CSVファイルとして保存"から同じ手順でスタッツを取得し保存したファイルをアップロードしてください。
+                2.**入力フォームの入力**: ID取得後元のページに戻り入力フォームの内容を埋めてください。"選手名または選手IDを入力"で選手を選ぶか先ほどコピーしたIDをペーストし、"シーズンを選択"から特定のシーズンを選択してください。もしCSVからシュートマップを作成する場合、モードの"CSVファイルとして保存"から同じ手順でスタッツを取得し保存したファイルをアップロードしてください。
 
                 3.**シュートマップを作成 & ダウンロード**: 入力フォームの入力後サイドバー内の"スタッツを取得"のボタンを押しシュートマップを作成。作成されたシュートマップを保存したい場合は、作成されたシュートマップの下にある"シュートマップをダウンロード"のボタンをクリックし画像をダウンロードしてください。
             """)
@@ -54,10 +43,13 @@ def app():
         st.markdown("---")
     
         # サイドバー UI
-        player_id = st.text_input("選手IDを入力", placeholder="例: 1234", key='id_get_mobile')
+        player_id = player_id_input(st, "選手名または選手IDを入力", key='id_get_mobile')
         season = st.selectbox("シーズンを選択", [str(y) for y in range(2024, 2013, -1)], key='season_get_mobile')
+        view_labels = LABELS["ja"]["views"]
+        view = st.selectbox("表示方法", list(view_labels), format_func=view_labels.get, key='view_get_mobile')
+        smooth = st.checkbox("なめらかに表示", key='smooth_get_mobile') if view != "shots" else False
         with st.expander("CSVからシュートマップを作成する場合"):
-            uploaded_file = st.file_uploader("CSVファイルをアップロード", type="csv", key='file_get_mobile')
+            uploaded_file = st.file_uploader("CSV・Parquetファイルをアップロード", type=["csv", "parquet"], key='file_get_mobile')
     
         # 状態初期化
         if "df_season" not in st.session_state:
@@ -67,18 +59,16 @@ def app():
     
         # ボタンで取得トリガー
         if st.button("スタッツを取得", key='btn_1_mobile') or uploaded_file:
+            timer = start_request("mobile", "スタッツの取得")
             try:
                 if uploaded_file:
-                    df = pd.read_csv(uploaded_file)
+                    df = get_uploaded_shots(uploaded_file)
                     df_season = df
-                    player_name = df["player"].iloc[0] if "player" in df.columns else "Player"
-                    season_from_csv = df["season"].iloc[0] if "season" in df.columns else "Unknown"
+                    player_name = df["player"].iloc[0] if not df.empty else "Player"
+                    season_from_csv = df["season"].iloc[0] if not df.empty else "Unknown"
                 else:
-                    client = understatapi.UnderstatClient()
-                    player_data = client.player(player=player_id).get_shot_data()
-                    df = pd.DataFrame(player_data)
-                    df_season = df[df["season"] == season]
-                    player_name = df["player"].iloc[0] if not df_season.empty else "Player"
+                    df_season = get_player_shots(player_id, season)
+                    player_name = df_season["player"].iloc[0] if not df_season.empty else "Player"
                     season_from_csv = season
     
                 # セッション保存
@@ -88,99 +78,38 @@ def app():
     
                 st.success(f"{player_name} のシーズン {season_from_csv} のデータを取得しました。")
     
-                # データ整形
-                df = df_season.copy()
-                df["X"] = df["X"].astype(float) * 100
-                df["Y"] = df["Y"].astype(float) * 100
-                df["xG"] = df["xG"].astype(float)
-    
-                total_shots = df.shape[0]
-                total_goals = df[df["result"] == "Goal"].shape[0]
-                total_xG = df["xG"].sum()
-                xG_per_shot = total_xG / total_shots if total_shots > 0 else 0
-                points_average_distance = df["X"].mean()
-                actual_average_distance = (120 - (df["X"] * 1.2).mean()) * 0.9144
-    
-                # プロット
-                fig = plt.figure(figsize=(8, 12))
-                fig.patch.set_facecolor(background_color)
-    
-                ax1 = fig.add_axes([0, .7, 1, .2])
-                ax1.set_facecolor(background_color)
-                ax1.set_xlim(0, 1)
-                ax1.set_ylim(0, 1)
-                ax1.axis("off")
-                ax1.text(.5, .9, player_name, fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='center')
-                ax1.text(.5, .75, f'{season_from_csv} シーズンのリーグ戦でのシュートスタッツ', fontsize=14, fontproperties=font_prop, fontweight='bold', color='white', ha='center')
-                ax1.text(.2, .5, 'ゴール期待値(小)', fontsize=12, fontproperties=font_prop, fontweight='bold', color='white', ha='center')
-                for i, x in enumerate([.37, .42, .48, .54, .6]):
-                    ax1.scatter(x, .53, s=(i+1)*100, color=background_color, edgecolor='white', linewidth=0.8)
-                ax1.text(.8, .5, 'ゴール期待値(大)', fontsize=12, fontproperties=font_prop, fontweight='bold', color='white', ha='center')
-                ax1.text(.45, .27, 'ゴール', fontsize=10, fontproperties=font_prop, color='white', ha='right')
-                ax1.scatter(.47, .3, s=100, color='red', edgecolor='white', linewidth=0.8, alpha=0.7)
-                ax1.scatter(.53, .3, s=100, color=background_color, edgecolor='white', linewidth=0.8)
-                ax1.text(.55, .27, 'ノーゴール', fontsize=10, fontproperties=font_prop, color='white', ha='left')
-    
-                ax2 = fig.add_axes([.05, .25, .9, .5])
-                pitch = VerticalPitch(pitch_type='opta', half=True, pitch_color=background_color, pad_bottom=0.5, line_color='white', linewidth=0.75, axis=True, label=True)
-                pitch.draw(ax=ax2)
-                ax2.set_facecolor(background_color)
-                ax2.axis("off")
-                ax2.scatter(90, points_average_distance, s=100, color='white', linewidth=0.8)
-                ax2.plot([90, 90], [100, points_average_distance], color='white', linewidth=2)
-                ax2.text(90, points_average_distance - 4, f'平均シュート距離\n{actual_average_distance:.1f} M', fontsize=10, fontproperties=font_prop, color='white', ha='center')
-                for shot in df.to_dict(orient='records'):
-                    pitch.scatter(shot['X'], shot['Y'], s=300 * shot['xG'], color='red' if shot['result'] == 'Goal' else background_color, ax=ax2, alpha=0.7, linewidth=0.8, edgecolor='white')
-    
-                ax3 = fig.add_axes([0, .2, 1, .05])
-                ax3.set_facecolor(background_color)
-                ax3.axis("off")
-                ax3.text(.05, .5, 'シュート数', fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='left')
-                ax3.text(.11, 0, f'{total_shots}', fontsize=16, fontproperties=font_prop, color='red', ha='left')
-                ax3.text(.28, .5, 'ゴール数', fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='left')
-                ax3.text(.33, 0, f'{total_goals}', fontsize=16, fontproperties=font_prop, color='red', ha='left')
-                ax3.text(.48, .5, 'ゴール期待値', fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='left')
-                ax3.text(.54, 0, f'{total_xG:.2f}', fontsize=16, fontproperties=font_prop, color='red', ha='left')
-                ax3.text(.75, .5, 'シュート効率', fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='left')
-                ax3.text(.82, 0, f'{xG_per_shot:.2f}', fontsize=16, fontproperties=font_prop, color='red', ha='left')
+                # プロット(同じ内容の画像が保存済みならそれを使い、なければ選手ごとのデータだけを描画)
+                png = shot_map_image("single", [(df_season, player_name, season_from_csv)], profile="mobile", view=view, smooth=smooth)
     
                 # 表示と保存
-                buf = io.BytesIO()
-                st.pyplot(fig)
-                fig.savefig(buf, format="png", bbox_inches="tight", facecolor=fig.get_facecolor())
-                st.download_button(
-                    label="画像をダウンロード",
-                    data=buf.getvalue(),
-                    file_name=f"{player_name.replace(' ', '_')}_{season_from_csv}.png",
-                    mime="image/png"
-                )
+                with timed("download_prep"):
+                    st.image(png, use_column_width=True)
+                    st.download_button(
+                        label="画像をダウンロード",
+                        data=png,
+                        file_name=f"{player_name.replace(' ', '_')}_{season_from_csv}.png",
+                        mime="image/png"
+                    )
     
             except Exception as e:
                 st.error(f"スタッツの取得または描画に失敗しました: {e}")
+            finally:
+                finish_request(timer)
     
    
 
     elif mode == "スタッツの比較":
-        import pandas as pd
-        import matplotlib.pyplot as plt
-        import understatapi
-        from mplsoccer import VerticalPitch
-        import io
-        from matplotlib import font_manager
-
-        background_color = "#0C0D0E"
-
-        from pathlib import Path
-        from matplotlib import font_manager
-
-        font_path = Path(__file__).parent / "fonts" / "NotoSansJP-Regular.otf"
-        font_prop = font_manager.FontProperties(fname=str(font_path))
+        from functools import partial
 
+        from demo.player_directory import player_id_input
+        from demo.shot_data import MAX_COMPARE_PLAYERS, load_comparison_player, run_concurrently
+        from demo.shot_map import LABELS, comparison_layout, shot_map_image
+        from demo.timing import finish_request, start_request, timed
 
         st.title("シュートマップ作成(比較)")
         with st.expander("ツールの説明"):
             st.markdown("""
-                ここでは2つのスタッツを取得しそこからそれぞれのスタッツを比較したシュートマップを作成することができます。
+                ここでは最大8選手分のスタッツを取得しそこからそれぞれのスタッツを比較したシュートマップを作成することができます。
             """)
 
         with st.expander("ツールの使い方"):
@@ -190,187 +119,166 @@ def app():
 
         st.markdown("---")
 
-        player1_id = st.text_input("選手1のIDを入力", placeholder="例: 1234", key="p1_mobile")
-        season1 = st.selectbox("選手1のシーズンを選択", [str(y) for y in range(2024, 2013, -1)], key="s1_mobile")
-
-        player2_id = st.text_input("選手2のIDを入力", placeholder="例: 5678", key="p2_mobile")
-        season2 = st.selectbox("選手2のシーズンを選択", [str(y) for y in range(2024, 2013, -1)], key="s2_mobile")
+        count = st.number_input("比較する選手の数", min_value=2, max_value=MAX_COMPARE_PLAYERS, value=2, step=1, key="count_mobile")
+        player_ids, seasons = [], []
+        for i in range(1, count + 1):
+            player_ids.append(player_id_input(st, f"選手{i}の名前またはIDを入力", key=f"p{i}_mobile"))
+            seasons.append(st.selectbox(f"選手{i}のシーズンを選択", [str(y) for y in range(2024, 2013, -1)], key=f"s{i}_mobile"))
 
         with st.expander("CSVからシュートマップを作成する場合"):
-            uploaded_file1 = st.file_uploader("選手1のCSVファイルをここにアップロード", type="csv", key="file1_mobile")
-            uploaded_file2 = st.file_uploader("選手2のCSVファイルをここにアップロード", type="csv", key="file2_mobile")
+            uploaded_files = [st.file_uploader(f"選手{i}のCSV・Parquetファイルをここにアップロード", type=["csv", "parquet"], key=f"file{i}_mobile") for i in range(1, count + 1)]
+
+        view_labels = LABELS["ja"]["views"]
+        view = st.selectbox("表示方法", list(view_labels), format_func=view_labels.get, key='view_compare_mobile')
+        smooth = st.checkbox("なめらかに表示", key='smooth_compare_mobile') if view != "shots" else False
 
         if st.button("スタッツを比較", key='btn_2_mobile'):
+            timer = start_request("mobile", "スタッツの比較")
             try:
-                client = understatapi.UnderstatClient()
+                # 全選手分のデータを並列に取得
+                results = run_concurrently([
+                    partial(load_comparison_player, uploaded_file, player_id, season, f"Player{i}")
+                    for i, (uploaded_file, player_id, season) in enumerate(zip(uploaded_files, player_ids, seasons), 1)
+                ])
+                for i, (_, error) in enumerate(results, 1):
+                    if error is not None:
+                        st.error(f"選手{i}のスタッツの取得に失敗しました: {error}")
+                if any(error is not None for _, error in results):
+                    st.stop()
+                players = [result for result, _ in results]
+    
+                st.success("、".join(f"{name} ({season})" for _, name, season in players) + " のデータを取得しました。")
+    
+                # 2選手なら上下に向かい合わせ、3選手以上はハーフピッチを並べて描画
+                png = shot_map_image(comparison_layout(len(players), "mobile"), players, profile="mobile", view=view, smooth=smooth)
+    
+                with timed("download_prep"):
+                    st.image(png, use_column_width=True)
+                    st.download_button(
+                        label="画像をダウンロード",
+                        data=png,
+                        file_name="_vs_".join(f"{name.replace(' ', '_')}_{season}" for _, name, season in players) + ".png",
+                        mime="image/png"
+                    )
+    
+            except Exception as e:
+                st.error(f"スタッツの取得または描画に失敗しました: {e}")
+            finally:
+                finish_request(timer)
 
-                if uploaded_file1:
-                    df1 = pd.read_csv(uploaded_file1)
-                    name1 = df1["player"].iloc[0] if "player" in df1.columns else "Player1"
-                    season1 = df1["season"].iloc[0] if "season" in df1.columns else "Unknown"
-                else:
-                    data1 = client.player(player=player1_id).get_shot_data()
-                    df1 = pd.DataFrame(data1)
-                    df1 = df1[df1["season"] == season1]
-                    name1 = df1["player"].iloc[0] if not df1.empty else "Player1"
-
-                if uploaded_file2:
-                    df2 = pd.read_csv(uploaded_file2)
-                    name2 = df2["player"].iloc[0] if "player" in df2.columns else "Player2"
-                    season2 = df2["season"].iloc[0] if "season" in df2.columns else "Unknown"
+
+
+    elif mode == "キャリアのスタッツ":
+        from demo.player_directory import player_id_input
+        from demo.shot_data import filter_season, get_player_shots, get_player_summary
+        from demo.shot_map import LABELS, career_table, shot_map_image
+        from demo.timing import finish_request, start_request, timed
+
+        st.title("シュートマップ作成(キャリア)")
+        with st.expander("ツールの説明"):
+            st.markdown("""
+                ここでは選手の全シーズンのシュートデータを一度に取得し、シーズンごとのスタッツの推移と全シーズン分のシュートマップを作成することができます。データは一度だけ取得するので、シーズンを切り替えてもすぐに表示されます。
+            """)
+
+        st.markdown("---")
+
+        player_id = player_id_input(st, "選手名または選手IDを入力", key='id_career_mobile')
+
+        # 取得した選手を覚えておき、シーズンを切り替えたときの再実行でも表示を続ける
+        if st.button("キャリアのスタッツを取得", key='btn_4_mobile'):
+            st.session_state["career_player_id"] = player_id
+
+        if st.session_state.get("career_player_id"):
+            timer = start_request("mobile", "キャリアのスタッツ")
+            try:
+                career_player_id = st.session_state["career_player_id"]
+                # 全シーズンのデータはキャッシュから返るため、2回目以降は取得し直さない
+                df = get_player_shots(career_player_id)
+                if df.empty:
+                    st.warning("シュートのデータがありません。")
+                    st.stop()
+                player_name = df["player"].iloc[0]
+
+                # シーズンごとの集計値は保存時に計算済みのものを使う
+                table = career_table(get_player_summary(career_player_id))
+                seasons = list(table.index[:-1])
+                st.success(f"{player_name} の {len(seasons)} シーズン分のデータを取得しました。")
+                st.dataframe(table, use_container_width=True)
+
+                season = st.selectbox("シュートマップのシーズンを選択", ["全シーズン"] + seasons[::-1], key='season_career_mobile')
+                view_labels = LABELS["ja"]["views"]
+                view = st.selectbox("表示方法", list(view_labels), format_func=view_labels.get, key='view_career_mobile')
+                smooth = st.checkbox("なめらかに表示", key='smooth_career_mobile') if view != "shots" else False
+                if season == "全シーズン":
+                    df_season, season_label = df, f"{seasons[0]}〜{seasons[-1]}"
                 else:
-                    data2 = client.player(player=player2_id).get_shot_data()
-                    df2 = pd.DataFrame(data2)
-                    df2 = df2[df2["season"] == season2]
-                    name2 = df2["player"].iloc[0] if not df2.empty else "Player2"
-
-                df1["X"] = df1["X"].astype(float) * 100
-                df1["Y"] = df1["Y"].astype(float) * 100
-                df1["xG"] = df1["xG"].astype(float)
-
-                df2["X"] = df2["X"].astype(float) * 100
-                df2["Y"] = df2["Y"].astype(float) * 100
-                df2["xG"] = df2["xG"].astype(float)
-    
-                st.success(f"{name1} ({season1}) と {name2} ({season2}) のデータを取得しました。")
-    
-                total_shots_1 = df1.shape[0]
-                total_goals_1 = df1[df1["result"] == "Goal"].shape[0]
-                total_xG_1 = df1["xG"].sum()
-                xG_per_shot_1 = total_xG_1 / total_shots_1 if total_shots_1 > 0 else 0
-                dist_points_1 = df1["X"].mean()
-                actual_avg_dist_1 = (120 - (df1["X"] * 1.2).mean()) * 0.9144
-    
-                total_shots_2 = df2.shape[0]
-                total_goals_2 = df2[df2["result"] == "Goal"].shape[0]
-                total_xG_2 = df2["xG"].sum()
-                xG_per_shot_2 = total_xG_2 / total_shots_2 if total_shots_2 > 0 else 0
-                dist_points_2 = df2["X"].mean()
-                actual_avg_dist_2 = (120 - (df2["X"] * 1.2).mean()) * 0.9144
-    
-                fig = plt.figure(figsize=(8, 12))
-                fig.patch.set_facecolor(background_color)
-    
-                # 上側のプレイヤー（player1）
-                ax_title1 = fig.add_axes([0, .7, 1, .2])
-                ax_title1.set_facecolor(background_color)
-                ax_title1.set_xlim(0, 1)
-                ax_title1.set_ylim(0, 1)
-                ax_title1.set_xticks([])
-                ax_title1.set_yticks([])
-                ax_title1.set_frame_on(False)
-    
-                ax_title1.text(.5, .9, name1, fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='center')
-                ax_title1.text(.5, .75, f"{season1} シーズンのリーグ戦でのシュートスタッツ", fontsize=14, fontproperties=font_prop, fontweight='bold', color='white', ha='center')
-    
-                for i, x in enumerate([.37, .42, .48, .54, .6]):
-                    ax_title1.scatter(x, .53, s=(i + 1) * 100, color=background_color, edgecolor='white', linewidth=.8)
-    
-                ax_title1.text(.2, .5, "ゴール期待値(小)", fontsize=12, fontproperties=font_prop, fontweight='bold', color='white', ha='center')
-                ax_title1.text(.8, .5, "ゴール期待値(大)", fontsize=12, fontproperties=font_prop, fontweight='bold', color='white', ha='center')
-                ax_title1.text(.45, .27, "ゴール", fontsize=10, fontproperties=font_prop, color='white', ha='right')
-                ax_title1.scatter(.47, .3, s=100, color='red', edgecolor='white', linewidth=.8, alpha=.7)
-                ax_title1.scatter(.53, .3, s=100, color=background_color, edgecolor='white', linewidth=.8)
-                ax_title1.text(.55, .27, "ノーゴール", fontsize=10, fontproperties=font_prop, color='white', ha='left')
-    
-                ax_pitch1 = fig.add_axes([.05, .25, .9, .5])
-                pitch = VerticalPitch(pitch_type='opta', half=True, pitch_color=background_color, pad_bottom=.5, line_color='white', linewidth=.75, axis=True, label=True)
-                pitch.draw(ax=ax_pitch1)
-                ax_pitch1.set_facecolor(background_color)
-                ax_pitch1.set_xticks([])
-                ax_pitch1.set_yticks([])
-                ax_pitch1.set_frame_on(False)
-                ax_pitch1.scatter(90, dist_points_1, s=100, color='white', linewidth=.8)
-                ax_pitch1.plot([90, 90], [100, dist_points_1], color='white', linewidth=2)
-                ax_pitch1.text(90, dist_points_1 - 4, f"平均シュート距離\n{actual_avg_dist_1:.1f} M", fontsize=10, fontproperties=font_prop, color='white', ha='center')
-    
-                ax_stats1 = fig.add_axes([0, .2, 1, .05])
-                ax_stats1.set_facecolor(background_color)
-                ax_stats1.set_xticks([])
-                ax_stats1.set_yticks([])
-                ax_stats1.set_frame_on(False)
-                ax_stats1.text(.05, 4, 'シュート数', fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='left')
-                ax_stats1.text(.11, 3.5, f'{total_shots_1}', fontsize=16, fontproperties=font_prop, color='red', ha='left')
-                ax_stats1.text(.28, 4, 'ゴール数', fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='left')
-                ax_stats1.text(.33, 3.5, f'{total_goals_1}', fontsize=16, fontproperties=font_prop, color='red', ha='left')
-                ax_stats1.text(.48, 4, 'ゴール期待値', fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='left')
-                ax_stats1.text(.54, 3.5, f'{total_xG_1:.2f}', fontsize=16, fontproperties=font_prop, color='red', ha='left')
-                ax_stats1.text(.75, 4, 'シュート効率', fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='left')
-                ax_stats1.text(.82, 3.5, f'{xG_per_shot_1:.2f}', fontsize=16, fontproperties=font_prop, color='red', ha='left')
-    
-                for shot in df1.to_dict(orient='records'):
-                    pitch.scatter(shot['X'], shot['Y'], s=300 * shot['xG'], color='red' if shot['result'] == 'Goal' else background_color, ax=ax_pitch1, alpha=0.7, linewidth=0.8, edgecolor='white')
-    
-                # 下側のプレイヤー（player2）
-                ax_title2 = fig.add_axes([0, -0.35, 1, 0.2])
-                ax_title2.set_facecolor(background_color)
-                ax_title2.set_xlim(0, 1)
-                ax_title2.set_ylim(0, 1)
-                ax_title2.set_xticks([])
-                ax_title2.set_yticks([])
-                ax_title2.set_frame_on(False)
-    
-                ax_title2.text(0.5, 0.1, name2, fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='center')
-                ax_title2.text(0.5, 0.25, f"{season2} シーズンのリーグ戦でのシュートスタッツ", fontsize=14, fontproperties=font_prop, fontweight='bold', color='white', ha='center')
-    
-                for i, x in enumerate([.37, .42, .48, .54, .6]):
-                    ax_title2.scatter(x, .53, s=(i + 1) * 100, color=background_color, edgecolor='white', linewidth=.8)
-    
-                ax_title2.text(.2, .5, "ゴール期待値(小)", fontsize=12, fontproperties=font_prop, fontweight='bold', color='white', ha='center')
-                ax_title2.text(.8, .5, "ゴール期待値(大)", fontsize=12, fontproperties=font_prop, fontweight='bold', color='white', ha='center')
-                ax_title2.text(.45, .7, "ゴール", fontsize=10, fontproperties=font_prop, color='white', ha='right')
-                ax_title2.scatter(.47, .73, s=100, color='red', edgecolor='white', linewidth=.8, alpha=.7)
-                ax_title2.scatter(.53, .73, s=100, color=background_color, edgecolor='white', linewidth=.8)
-                ax_title2.text(.55, .7, "ノーゴール", fontsize=10, fontproperties=font_prop, color='white', ha='left')
-    
-                ax_pitch2 = fig.add_axes([.05, -.2, .9, .5])
-                pitch.draw(ax=ax_pitch2)
-                ax_pitch2.set_facecolor(background_color)
-                ax_pitch2.set_xticks([])
-                ax_pitch2.set_yticks([])
-                ax_pitch2.set_frame_on(False)
-                ax_pitch2.scatter(90, dist_points_2, s=100, color='white', linewidth=.8)
-                ax_pitch2.plot([90, 90], [100, dist_points_2], color='white', linewidth=2)
-                ax_pitch2.text(90, dist_points_2 - 4, f"平均シュート距離\n{actual_avg_dist_2:.1f} M", fontsize=10, fontproperties=font_prop, color='white', ha='center')
-            
-                ax_stats2 = fig.add_axes([0, .0, 1, .05])
-                ax_stats2.set_facecolor(background_color)
-                ax_stats2.set_xticks([])
-                ax_stats2.set_yticks([])
-                ax_stats2.set_frame_on(False)
-                ax_stats2.text(.05, 3, 'シュート数', fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='left')
-                ax_stats2.text(.11, 2.5, f'{total_shots_2}', fontsize=16, fontproperties=font_prop, color='red', ha='left')
-                ax_stats2.text(.28, 3, 'ゴール数', fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='left')
-                ax_stats2.text(.33, 2.5, f'{total_goals_2}', fontsize=16, fontproperties=font_prop, color='red', ha='left')
-                ax_stats2.text(.48, 3, 'ゴール期待値', fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='left')
-                ax_stats2.text(.54, 2.5, f'{total_xG_2:.2f}', fontsize=16, fontproperties=font_prop, color='red', ha='left')
-                ax_stats2.text(.75, 3, 'シュート効率', fontsize=20, fontproperties=font_prop, fontweight='bold', color='white', ha='left')
-                ax_stats2.text(.82, 2.5, f'{xG_per_shot_2:.2f}', fontsize=16, fontproperties=font_prop, color='red', ha='left')
-    
-                for shot in df2.to_dict(orient='records'):
-                    pitch.scatter(shot['X'], shot['Y'], s=300 * shot['xG'], color='red' if shot['result'] == 'Goal' else background_color, ax=ax_pitch2, alpha=0.7, linewidth=0.8, edgecolor='white')
-    
-                ax_pitch2.invert_yaxis()
-    
-                buf = io.BytesIO()
-                st.pyplot(fig)
-                fig.savefig(buf, format="png", bbox_inches="tight", facecolor=fig.get_facecolor())
-                st.download_button(
-                    label="画像をダウンロード",
-                    data=buf.getvalue(),
-                    file_name=f"{name1.replace(' ', '_')}_{season1}_vs_{name2.replace(' ', '_')}_{season2}.png",
-                    mime="image/png"
-                )
-    
+                    df_season, season_label = filter_season(df, season), season
+                png = shot_map_image("single", [(df_season, player_name, season_label)], profile="mobile", view=view, smooth=smooth)
+
+                with timed("download_prep"):
+                    st.image(png, use_column_width=True)
+                    st.download_button(
+                        label="画像をダウンロード",
+                        data=png,
+                        file_name=f"{player_name.replace(' ', '_')}_{season_label}.png",
+                        mime="image/png"
+                    )
+
             except Exception as e:
                 st.error(f"スタッツの取得または描画に失敗しました: {e}")
+            finally:
+                finish_request(timer)
 
+    elif mode == "ランキング":
+        from demo.leaderboard import LEAGUE_NAMES, METRICS, get_index, leaderboard
+        from demo.shot_map import LABELS
+        from demo.timing import finish_request, start_request, timed
 
+        st.title("ランキング")
+        with st.expander("ツールの説明"):
+            st.markdown("""
+                ここではリーグ単位で保存した全選手のスタッツから、リーグ・シーズン・チームで絞り込んだランキングを作成することができます。シュート数の少ない選手を除きたい場合は"シュート数の下限"を指定してください。
+            """)
+
+        st.markdown("---")
+
+        timer = start_request("mobile", "ランキング")
+        try:
+            with timed("leaderboard_index"):
+                index = get_index()
+            if index.table.empty:
+                st.info("保存済みのデータがありません。tools/crawl_leagues.py でリーグ単位のデータを保存してください。")
+                st.stop()
+
+            league = st.selectbox("リーグ", [None] + list(LEAGUE_NAMES), format_func=lambda v: "全リーグ" if v is None else LEAGUE_NAMES[v], key='league_rank_mobile')
+            season = st.selectbox("シーズン", [None] + index.choices("season", league=league)[::-1], format_func=lambda v: "全シーズン" if v is None else v, key='season_rank_mobile')
+            team = st.selectbox("チーム", [None] + index.choices("team", league=league, season=season), format_func=lambda v: "全チーム" if v is None else v, key='team_rank_mobile')
+            column_labels = LABELS["ja"]["career_columns"]
+            metric = st.selectbox("並べ替える項目", METRICS, index=METRICS.index("xG_per_shot"), format_func=column_labels.get, key='metric_rank_mobile')
+            ascending = st.checkbox("少ない順に並べる", key='ascending_rank_mobile')
+            min_shots = st.number_input("シュート数の下限", min_value=0, value=20, step=5, key='min_shots_rank_mobile')
+            page = st.number_input("ページ", min_value=1, value=1, step=1, key='page_rank_mobile')
+
+            with timed("leaderboard", metric=metric):
+                rows, total = leaderboard(metric, league=league, season=season, team=team, min_shots=min_shots, ascending=ascending, page=page, per_page=20)
+            if rows.empty:
+                st.warning("条件に合う選手がいません。")
+            else:
+                st.caption(f"{total} 件中 {rows['rank'].iloc[0]}〜{rows['rank'].iloc[-1]} 件目")
+                rows["league"] = rows["league"].map(LEAGUE_NAMES).fillna("")
+                rows = rows.round({"total_xG": 2, "xG_per_shot": 2, "actual_average_distance": 1})
+                st.dataframe(rows.rename(columns=dict(column_labels, rank="順位", player="選手", team="チーム", league="リーグ", season="シーズン", player_id="選手ID")).set_index("順位"), use_container_width=True)
+
+        except Exception as e:
+            st.error(f"ランキングの作成に失敗しました: {e}")
+        finally:
+            finish_request(timer)
 
     elif mode == "CSVファイルとして保存":
-        import pandas as pd
-        import understatapi
-        import altair as alt
+        from demo.player_directory import player_id_input
+        from demo.shot_data import get_player_shots
+        from demo.shot_table import to_understat_format
+        from demo.timing import finish_request, start_request, timed
     
         st.title("CSVファイルとして保存")
     
@@ -392,27 +300,83 @@ def app():
 
         st.markdown("---")
     
-        player_id = st.text_input("選手IDを入力",placeholder = "例: 1234", key='id_csv_mobile')
+        player_id = player_id_input(st, "選手名または選手IDを入力", key='id_csv_mobile')
         season = st.selectbox("シーズンを選択",["2024","2023","2022","2021","2020","2019","2018","2017","2016","2015","2014"], key='season_csv_mobile')
     
         if st.button("スタッツを取得", key='btn_3_mobile'):
+            timer = start_request("mobile", "CSVファイルとして保存")
             try:
-                client = understatapi.UnderstatClient()
-                player_data = client.player(player = player_id).get_shot_data()
-                df = pd.DataFrame(player_data)
-                df_season = df[df["season"] == season]
-                player_name = df["player"].iloc[0] if "player" in df.columns else "Player"
+                df_season = get_player_shots(player_id, season)
+                player_name = df_season["player"].iloc[0] if "player" in df_season.columns and not df_season.empty else "Player"
     
                 st.success(f"{player_name} の {season} シーズンのデータを取得しました。")
                 st.dataframe(df_season)
     
-                csv = df_season.to_csv(index = False).encode("utf-8")
-                st.download_button(
-                    label = "スタッツをダウンロード",
-                    data = csv,
-                    file_name = f"{player_name.replace(' ', '_')}_{season}.csv",
-                    mime = "text/csv"
-                )
+                with timed("download_prep"):
+                    csv = to_understat_format(df_season).to_csv(index = False).encode("utf-8")
+                    st.download_button(
+                        label = "スタッツをダウンロード",
+                        data = csv,
+                        file_name = f"{player_name.replace(' ', '_')}_{season}.csv",
+                        mime = "text/csv"
+                    )
     
             except Exception as e:
-                st.error(f"スタッツの取得に失敗しました。: {e}")
\ No newline at end of file
+                st.error(f"スタッツの取得に失敗しました。: {e}")
+            finally:
+                finish_request(timer)
+
+    elif mode == "まとめて保存":
+        from demo.leaderboard import LEAGUE_NAMES, get_index
+        from demo.shot_export import EXPORT_FORMATS, export_bytes, league_player_ids, parse_player_ids
+        from demo.timing import finish_request, start_request, timed
+
+        st.title("まとめて保存")
+        with st.expander("ツールについて"):
+            st.markdown("""
+                ここでは複数の選手・シーズンのシュートデータをまとめて1つのファイルとして保存することができます。選手IDを複数入力するか、リーグを選択するとそのリーグの保存済みの全選手のデータを保存できます。保存できるのは取得済みのデータのみです。まだ取得していない選手は、先に"スタッツの取得"などでデータを取得してください。
+
+                Parquet・Arrow IPC形式のファイルはCSVファイルよりも小さく、列の型もそのまま保存されます。pandasの場合は pd.read_parquet / pd.read_feather で読み込めます。
+            """)
+
+        st.markdown("---")
+
+        ids_text = st.text_area("選手IDを入力(複数の場合は改行またはカンマで区切る)", placeholder="例: 1234, 5678", key='ids_export_mobile')
+        leagues = st.multiselect("リーグの全選手を含める(保存済みのデータのみ)", list(LEAGUE_NAMES), format_func=LEAGUE_NAMES.get, key='leagues_export_mobile')
+        seasons = st.multiselect("シーズンを選択(選択しない場合は全シーズン)", [str(y) for y in range(2024, 2013, -1)], default=["2024"], key='seasons_export_mobile')
+        fmt = st.selectbox("ファイル形式", list(EXPORT_FORMATS), format_func=lambda f: EXPORT_FORMATS[f]["label"], key='format_export_mobile')
+
+        if st.button("まとめて保存", key='btn_5_mobile'):
+            timer = start_request("mobile", "まとめて保存")
+            try:
+                player_ids = parse_player_ids(ids_text)
+                if leagues:
+                    with timed("leaderboard_index"):
+                        index = get_index()
+                    player_ids = list(dict.fromkeys(player_ids + league_player_ids(index, leagues, seasons)))
+                if not player_ids:
+                    st.warning("選手IDを入力するか、リーグを選択してください。")
+                    st.stop()
+
+                # 選手ごとに読み込んでは一時ファイルに書き出すので、全選手分の表を一度にメモリに持たない
+                with timed("export", format=fmt, players=len(player_ids)):
+                    data, rows, failed = export_bytes(player_ids, seasons, fmt)
+                if failed:
+                    st.warning(f"{len(failed)} 人のデータは保存されていないか、読み込めませんでした: {', '.join(failed)}")
+                if not rows:
+                    st.warning("シュートのデータがありません。")
+                    st.stop()
+
+                st.success(f"{len(player_ids) - len(failed)} 人・{rows} 本のシュートデータを出力しました。")
+                with timed("download_prep"):
+                    st.download_button(
+                        label="データをダウンロード",
+                        data=data,
+                        file_name=f"shots_{'_'.join(sorted(seasons)) or 'all'}{EXPORT_FORMATS[fmt]['extension']}",
+                        mime=EXPORT_FORMATS[fmt]["mime"],
+                    )
+
+            except Exception as e:
+                st.error(f"データの出力に失敗しました: {e}")
+            finally:
+                finish_request(timer)
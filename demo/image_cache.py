@@ -0,0 +1,99 @@
+# 描画済みのシュートマップ画像を保存して使い回すコード
+# 入力データと描画設定のハッシュをキーにするため、内容が同じなら matplotlib を使わずに保存済みの画像を返す
+# 保存先: data/image_cache/<キーの先頭2文字>/<キー>.<拡張子>
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from demo.shot_cache import LRUCache
+
+CACHE_DIR = Path(os.environ.get("IMAGE_CACHE_DIR", Path(__file__).parent.parent / "data" / "image_cache"))
+
+# ディスクに保存する画像の合計サイズの上限(超えたら古く使われていないものから削除)
+MAX_DISK_BYTES = int(os.environ.get("IMAGE_CACHE_DISK_MB", 512)) * 1024 * 1024
+
+# よく使われる画像はメモリ上にも置いておく
+memory_cache = LRUCache(max_bytes=int(os.environ.get("IMAGE_CACHE_MB", 64)) * 1024 * 1024)
+
+_disk_lock = threading.Lock()
+_disk_bytes = None
+
+
+# settings(描画設定)と arrays(入力データ)から内容に対応するキーを作る
+def content_key(settings, arrays):
+    h = hashlib.sha256(repr(settings).encode("utf-8"))
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        h.update(f"{array.dtype}{array.shape}".encode("utf-8"))
+        h.update(array.tobytes())
+    return h.hexdigest()
+
+
+def cache_path(key, ext):
+    return CACHE_DIR / key[:2] / f"{key}.{ext}"
+
+
+def read_disk(key, ext):
+    path = cache_path(key, ext)
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    # 最終利用時刻を更新(削除は最終利用時刻が古い順に行う)
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return data
+
+
+def _scan_disk():
+    return [(p, p.stat()) for p in CACHE_DIR.glob("*/*") if p.is_file() and not p.name.startswith(".")]
+
+
+def write_disk(key, ext, data):
+    global _disk_bytes
+    path = cache_path(key, ext)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+    with _disk_lock:
+        if _disk_bytes is None:
+            _disk_bytes = sum(stat.st_size for _, stat in _scan_disk())
+        else:
+            _disk_bytes += len(data)
+        if _disk_bytes > MAX_DISK_BYTES:
+            _disk_bytes = _evict_disk()
+
+
+# 上限の9割になるまで、最終利用時刻が古いものから削除する
+def _evict_disk():
+    files = sorted(_scan_disk(), key=lambda item: item[1].st_mtime)
+    total = sum(stat.st_size for _, stat in files)
+    for path, stat in files:
+        if total <= MAX_DISK_BYTES * 0.9:
+            break
+        try:
+            path.unlink()
+            total -= stat.st_size
+        except FileNotFoundError:
+            pass
+    return total
+
+
+# メモリ → ディスク の順に探し、どちらにもなければ render() で描画して保存する
+def get_or_render(key, render, ext="png"):
+    def load():
+        data = read_disk(key, ext)
+        if data is None:
+            data = render()
+            write_disk(key, ext, data)
+        return data
+
+    return memory_cache.get_or_load((key, ext), load)
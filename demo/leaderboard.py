@@ -0,0 +1,108 @@
+# 保存済みの全選手・全シーズンの集計値(demo/shot_summary.py)からランキングを作るコード
+# 集計値の表をメモリに読み込み、リーグ・シーズン・チーム・選手ごとの行番号の索引を作っておくことで、
+# 「2023 シーズンのセリエAでシュート40本以上の選手のシュート効率の上位20人」のような問い合わせに
+# シュートデータを読まずにすぐ答える
+#
+# 使い方:
+#   rows, total = leaderboard("xG_per_shot", league="Serie_A", season="2023", min_shots=40, per_page=20)
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from demo.shot_crawler import read_checkpoint
+from demo.shot_store import STORE_DIR, summary_table
+
+# 索引を作り直すまでの秒数(新しく保存されたデータはこの時間が経つと反映される)
+INDEX_TTL_SECONDS = int(os.environ.get("LEADERBOARD_TTL_SECONDS", 5 * 60))
+
+LEAGUE_NAMES = {"EPL": "プレミアリーグ", "La_Liga": "ラ・リーガ", "Bundesliga": "ブンデスリーガ", "Serie_A": "セリエA", "Ligue_1": "リーグ・アン"}
+
+# 並べ替えに使える集計値
+METRICS = ["total_shots", "total_goals", "total_xG", "xG_per_shot", "actual_average_distance"]
+
+# 索引を作る列
+INDEX_COLUMNS = ["league", "season", "team", "player_id"]
+
+_index = None
+_index_lock = threading.Lock()
+
+
+# 選手・シーズンごとのリーグ(リーグ単位の取得 demo/shot_crawler.py の進捗に記録されている)
+def crawled_leagues():
+    leagues = {}
+    for path in (STORE_DIR / "_crawl").glob("season=*.json"):
+        if path.name.endswith(".matches.json"):
+            continue
+        checkpoint = read_checkpoint(path.stem.split("=", 1)[1])
+        for player_id, player in checkpoint["players"].items():
+            leagues[(player_id, checkpoint["season"])] = player["league"]
+    return leagues
+
+
+# 集計値の表にリーグの列を加える
+# リーグ単位で取得していないシーズンは、同じチームが取得済みのシーズンで所属していたリーグを使う
+def with_leagues(table):
+    leagues = crawled_leagues()
+    table["league"] = np.array([leagues.get(key, "") for key in zip(table["player_id"], table["season"])], dtype=object)
+    known = table[(table["league"] != "") & (table["team"] != "")]
+    team_leagues = known.groupby("team")["league"].agg(lambda s: s.mode().iloc[0]).to_dict()
+    unknown = table["league"] == ""
+    table.loc[unknown, "league"] = table.loc[unknown, "team"].map(team_leagues).fillna("")
+    return table
+
+
+class LeaderboardIndex:
+
+    def __init__(self, table):
+        self.table = table.reset_index(drop=True)
+        self.built_at = time.monotonic()
+        # 列の値 -> その値を持つ行番号の配列
+        self.indexes = {column: self.table.groupby(column, sort=False).indices for column in INDEX_COLUMNS}
+        self.values = {metric: self.table[metric].to_numpy(dtype=float) for metric in METRICS}
+        self.shots = self.table["total_shots"].to_numpy()
+
+    # 条件に合う行番号(条件がなければ全行)
+    def positions(self, **filters):
+        positions = None
+        for column, value in filters.items():
+            if value is None:
+                continue
+            found = self.indexes[column].get(str(value), np.array([], dtype=np.intp))
+            positions = found if positions is None else np.intersect1d(positions, found, assume_unique=True)
+        return np.arange(len(self.table)) if positions is None else positions
+
+    # 索引にある値の一覧(絞り込みの選択肢に使う)
+    def choices(self, column, **filters):
+        positions = self.positions(**filters)
+        return sorted(set(self.table[column].to_numpy()[positions]) - {""})
+
+
+def get_index(refresh=False):
+    global _index
+    with _index_lock:
+        if refresh or _index is None or time.monotonic() - _index.built_at > INDEX_TTL_SECONDS:
+            _index = LeaderboardIndex(with_leagues(summary_table()))
+        return _index
+
+
+# 条件に合う選手・シーズンを metric の順に並べ、page ページ目(1から)の per_page 件と条件に合う件数を返す
+def leaderboard(metric="xG_per_shot", league=None, season=None, team=None, player_id=None, min_shots=0,
+                ascending=False, page=1, per_page=20, index=None):
+    if metric not in METRICS:
+        raise ValueError(f"metric は {', '.join(METRICS)} のいずれかを指定してください: '{metric}'")
+    index = index or get_index()
+    positions = index.positions(league=league, season=season, team=team, player_id=player_id)
+    if min_shots:
+        positions = positions[index.shots[positions] >= min_shots]
+
+    values = index.values[metric][positions]
+    order = np.argsort(values if ascending else -values, kind="stable")
+    start = (max(page, 1) - 1) * per_page
+    selected = positions[order[start:start + per_page]]
+
+    rows = index.table.iloc[selected][["player", "team", "league", "season", "player_id"] + METRICS].reset_index(drop=True)
+    rows.insert(0, "rank", np.arange(start + 1, start + 1 + len(rows)))
+    return rows, len(positions)
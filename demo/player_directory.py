@@ -0,0 +1,224 @@
+# 選手名から選手IDを探すための選手名簿と検索のコード
+# 名簿(選手ID・選手名・チーム・リーグ・シーズン)は tools/build_player_directory.py で作成してファイルに保存しておき、
+# 入力途中の名前でもすぐに候補を返せるよう、名前の単語を並べた索引(前方一致)と3文字ずつの索引(あいまい検索)を作る
+# 保存先: data/shot_store/_players.json (環境変数 PLAYER_DIRECTORY で変更可能)
+#
+# 使い方:
+#   search_players("mbap")         # -> [{"id": "3423", "name": "Kylian Mbappe-Lottin", ...}, ...]
+#   check_player_id("99999999")    # 名簿にない選手IDなら ValueError(Understatに接続する前に弾く)
+
+import json
+import os
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import numpy as np
+
+from demo.shot_store import STORE_DIR, _atomic_write, meta_path
+
+DIRECTORY_PATH = Path(os.environ.get("PLAYER_DIRECTORY", STORE_DIR / "_players.json"))
+
+_index = None
+_index_mtime = None
+_index_lock = threading.Lock()
+
+
+# 大文字小文字・アクセント記号・記号の違いを無視して比べられるようにする("Mbappé-Lottin" -> "mbappe lottin")
+def normalize_name(text):
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+
+
+def read_directory(path=None):
+    try:
+        with open(path or DIRECTORY_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_directory(directory, path=None):
+    text = json.dumps(directory, ensure_ascii=False)
+    _atomic_write(Path(path or DIRECTORY_PATH), lambda p: p.write_text(text, encoding="utf-8"))
+
+
+# 名簿に1シーズン分の選手を追加する(同じ選手は最新のシーズンの名前・チーム・リーグにする)
+def add_player(directory, player_id, name, season, team="", league=""):
+    player_id = str(player_id)
+    season = str(season)
+    entry = directory.setdefault(player_id, {"id": player_id, "name": name, "team": team, "league": league, "seasons": []})
+    if season not in entry["seasons"]:
+        entry["seasons"] = sorted(entry["seasons"] + [season])
+    if season == entry["seasons"][-1]:
+        entry["name"] = name or entry["name"]
+        entry["team"] = team or entry["team"]
+        entry["league"] = league or entry["league"]
+
+
+# 保存済みの選手(集計値)とリーグ単位の取得の進捗に記録されている選手を名簿に追加する(Understatには接続しない)
+def add_local_players(directory):
+    from demo.leaderboard import crawled_leagues
+    from demo.shot_crawler import read_checkpoint
+    from demo.shot_store import summary_table
+
+    leagues = crawled_leagues()
+    for path in (STORE_DIR / "_crawl").glob("season=*.json"):
+        if path.name.endswith(".matches.json"):
+            continue
+        checkpoint = read_checkpoint(path.stem.split("=", 1)[1])
+        for player_id, player in checkpoint["players"].items():
+            add_player(directory, player_id, player["name"], checkpoint["season"], league=player["league"])
+    table = summary_table()
+    for player_id, name, season, team in zip(table["player_id"], table["player"], table["season"], table["team"]):
+        add_player(directory, player_id, name, season, team, leagues.get((player_id, season), ""))
+    return directory
+
+
+# リーグ・シーズンごとの選手一覧をUnderstatから取得して名簿に追加する
+# (1リーグ・1シーズンにつき1回だけ接続し、リクエストの間隔は rate で制限する)
+def add_league_players(directory, seasons, leagues, rate=2.0, log=print):
+    from demo.shot_crawler import RateLimiter, with_retries
+    from demo.shot_store import fetch_league_players
+
+    limiter = RateLimiter(rate)
+    for season in seasons:
+        for league in leagues:
+            players = with_retries(lambda: fetch_league_players(league, season), limiter)
+            for player in players:
+                add_player(directory, player["id"], player.get("player_name", ""), season, player.get("team_title", ""), league)
+            log(f"{season} {league}: {len(players)} 人")
+    return directory
+
+
+def _trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerSearchIndex:
+
+    def __init__(self, directory):
+        # 長くプレーしている選手ほど前に並べ、選手の番号の小さい順がそのまま候補の表示順になるようにする
+        self.entries = sorted(directory.values(), key=lambda e: (-len(e["seasons"]), normalize_name(e["name"]), e["id"]))
+        self.by_id = {entry["id"]: entry for entry in self.entries}
+
+        # (単語, 選手の番号, 名前の最初の単語か) を単語順に並べ、前方一致する範囲を二分探索で探す
+        triples = sorted((token, i, n == 0) for i, entry in enumerate(self.entries)
+                         for n, token in enumerate(normalize_name(entry["name"]).split()))
+        self.tokens = [token for token, _, _ in triples]
+        self.token_entries = np.array([i for _, i, _ in triples], dtype=np.int32)
+        self.token_first = np.array([first for _, _, first in triples], dtype=bool)
+
+        # あいまい検索用: 3文字 -> その3文字を含む単語の番号
+        self.words = sorted(set(self.tokens))
+        trigrams = {}
+        for w, word in enumerate(self.words):
+            for trigram in _trigrams(word):
+                trigrams.setdefault(trigram, []).append(w)
+        self.trigrams = {trigram: np.array(words, dtype=np.int32) for trigram, words in trigrams.items()}
+
+    # word で始まる単語を名前に含む選手の番号と、そのうち名前が word で始まる選手の番号
+    def prefix_entries(self, word):
+        start = bisect_left(self.tokens, word)
+        end = bisect_left(self.tokens, word + "\U0010ffff")
+        entries = self.token_entries[start:end]
+        return np.unique(entries), np.unique(entries[self.token_first[start:end]])
+
+    # word に似た単語を名前に含む選手の番号と似ている度合い(0-1)
+    # 3文字の一致が多い単語だけを詳しく比べる
+    def fuzzy_entries(self, word, candidates=10, cutoff=.6):
+        postings = [self.trigrams[trigram] for trigram in _trigrams(word) if trigram in self.trigrams]
+        if not postings:
+            return {}
+        counts = np.bincount(np.concatenate(postings), minlength=len(self.words))
+        top = np.argpartition(-counts, min(candidates, len(counts) - 1))[:candidates]
+        scores = {}
+        for w in top[counts[top] > 0]:
+            ratio = SequenceMatcher(None, word, self.words[w]).ratio()
+            if ratio < cutoff:
+                continue
+            start = bisect_left(self.tokens, self.words[w])
+            end = bisect_left(self.tokens, self.words[w] + " ")
+            for i in self.token_entries[start:end].tolist():
+                scores[i] = max(scores.get(i, 0), ratio)
+        return scores
+
+    # 全ての単語が前方一致する選手を優先し、見つからなければ綴りの近い選手を返す
+    def search(self, query, limit=10):
+        query = normalize_name(query)
+        if not query:
+            return []
+        if query.isdigit():
+            return [self.by_id[query]] if query in self.by_id else []
+
+        words = query.split()
+        found, first = self.prefix_entries(words[0])
+        for word in words[1:]:
+            found = np.intersect1d(found, self.prefix_entries(word)[0], assume_unique=True)
+        if len(found):
+            # 名前の先頭から一致する選手を上に
+            first = np.intersect1d(first, found, assume_unique=True)
+            ranked = np.concatenate([first[:limit], np.setdiff1d(found, first, assume_unique=True)[:limit]])[:limit].tolist()
+        else:
+            scores = Counter()
+            for word in words:
+                for i, score in self.fuzzy_entries(word).items():
+                    scores[i] += score
+            ranked = [i for i, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]]
+        return [self.entries[i] for i in ranked]
+
+
+# 名簿のファイルが更新されていたら索引を作り直す
+def get_index():
+    global _index, _index_mtime
+    try:
+        mtime = DIRECTORY_PATH.stat().st_mtime
+    except FileNotFoundError:
+        mtime = None
+    with _index_lock:
+        if _index is None or mtime != _index_mtime:
+            _index = PlayerSearchIndex(read_directory() if mtime is not None else {})
+            _index_mtime = mtime
+        return _index
+
+
+def search_players(query, limit=10):
+    return get_index().search(query, limit)
+
+
+# 候補の表示名("Kylian Mbappe-Lottin (Paris Saint Germain, 2017-2024)")
+def player_label(entry):
+    seasons = entry["seasons"]
+    span = seasons[0] if len(seasons) == 1 else f"{seasons[0]}-{seasons[-1]}"
+    return f"{entry['name']} ({entry['team']}, {span})" if entry["team"] else f"{entry['name']} ({span})"
+
+
+# 名簿があるのに載っていない(保存済みでもない)選手IDは、Understatに接続せずにエラーにする
+# (名簿を作っていない場合は確認しない)
+def check_player_id(player_id):
+    index = get_index()
+    if not index.by_id or player_id in index.by_id or meta_path(player_id).exists():
+        return
+    raise ValueError(f"選手ID {player_id} の選手は見つかりません。選手名で検索するか、IDを確認してください")
+
+
+# 選手名(途中まででもよい)または選手IDを入力する欄(container は st か st.sidebar)
+# 名前を入力した場合は候補から選手を選んでもらい、選んだ選手のIDを返す
+def player_id_input(container, label, key):
+    text = container.text_input(label, placeholder="例: Mbappe / 1234", key=key).strip()
+    if not text or text.isdigit():
+        return text
+    index = get_index()
+    if not index.by_id:
+        container.caption("選手名簿が作成されていないため、選手IDを入力してください。")
+        return text
+    found = {entry["id"]: entry for entry in index.search(text)}
+    if not found:
+        container.warning(f"'{text}' に該当する選手が見つかりません。")
+        return text
+    return container.selectbox("候補から選手を選択", list(found), format_func=lambda player_id: player_label(found[player_id]), key=f"{key}_choice")
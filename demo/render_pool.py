@@ -0,0 +1,133 @@
+# シュートマップの描画を別プロセスで行うコード
+# matplotlib は複数のセッションから同時に使うと安全ではないため、描画専用のプロセスを用意して
+# 全てのCPUコアで並列に描画し、重い描画が他のセッションを止めないようにする
+
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+# 描画プロセスの数(0 にするとプロセスを使わずその場で描画する)
+WORKERS = int(os.environ.get("RENDER_WORKERS", os.cpu_count() or 1))
+
+# 同時に受け付ける描画ジョブの数(描画中 + 待機中)
+MAX_PENDING = int(os.environ.get("RENDER_QUEUE_SIZE", max(WORKERS, 1) * 4))
+
+# 1枚の描画を待つ最大の秒数
+TIMEOUT_SECONDS = float(os.environ.get("RENDER_TIMEOUT_SECONDS", 30))
+
+_lock = threading.Lock()
+_pool = None
+_slots = threading.BoundedSemaphore(MAX_PENDING)
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+    from demo.shot_map import warm_templates
+    warm_templates()
+
+
+def _noop():
+    pass
+
+
+def get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            import multiprocessing
+            # Streamlit のサーバーはスレッドを持つため fork ではなく spawn でプロセスを作る
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker)
+        return _pool
+
+
+# 最初の描画を待たずに描画プロセスを起動しておく
+def warmup():
+    if WORKERS <= 0:
+        return
+    pool = get_pool()
+    for _ in range(WORKERS):
+        pool.submit(_noop)
+
+
+def shutdown():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# プロセス間で受け渡すため、描画に必要な列だけをNumPy配列にする
+def to_job(layout_name, players, profile, lang, view="shots", smooth=False, fmt="png"):
+    shots = []
+    for df, name, season in players:
+        shots.append(({
+            "X": df["X"].to_numpy(dtype=float),
+            "Y": df["Y"].to_numpy(dtype=float),
+            "xG": df["xG"].to_numpy(dtype=float),
+            "goal": df["result"].to_numpy() == "Goal",
+        }, str(name), str(season)))
+    return {"layout": layout_name, "players": shots, "profile": profile, "lang": lang, "view": view, "smooth": smooth, "format": fmt}
+
+
+# 描画プロセス側で実行される(画像と、描画・保存それぞれにかかった秒数を返す)
+def render_job(job):
+    import numpy as np
+    import pandas as pd
+    from demo.shot_map import draw_shot_map, render_image
+
+    players = []
+    for arrays, name, season in job["players"]:
+        df = pd.DataFrame({"X": arrays["X"], "Y": arrays["Y"], "xG": arrays["xG"], "result": np.where(arrays["goal"], "Goal", "")})
+        players.append((df, name, season))
+    start = time.perf_counter()
+    fig = draw_shot_map(job["layout"], players, job["profile"], job["lang"], job["view"], job["smooth"], vector=job["format"] == "svg")
+    draw_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    image = render_image(fig, job["format"])
+    return image, {"draw": draw_seconds, "savefig": time.perf_counter() - start}
+
+
+def _record(timings):
+    from demo.timing import current_timer
+
+    timer = current_timer()
+    if timer is not None:
+        for stage, seconds in timings.items():
+            timer.add(stage, seconds)
+
+
+def render_shot_map(layout_name, players, profile="desktop", lang="ja", view="shots", smooth=False, fmt="png", timeout=None):
+    job = to_job(layout_name, players, profile, lang, view, smooth, fmt)
+    if WORKERS <= 0:
+        image, timings = render_job(job)
+        _record(timings)
+        return image
+
+    timeout = TIMEOUT_SECONDS if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    if not _slots.acquire(timeout=timeout):
+        raise TimeoutError("描画の待ちが混み合っています。しばらくしてから再度お試しください。")
+    try:
+        future = get_pool().submit(render_job, job)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+
+    try:
+        image, timings = future.result(timeout=max(deadline - time.monotonic(), 0))
+    except FutureTimeoutError:
+        future.cancel()
+        raise TimeoutError(f"シュートマップの描画が {timeout:g} 秒以内に終わりませんでした。")
+    except BrokenProcessPool:
+        # 描画プロセスが異常終了した場合は次回新しく作り直す
+        shutdown()
+        raise
+    _record(timings)
+    return image
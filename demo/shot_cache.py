@@ -0,0 +1,124 @@
+# プロセス全体(全てのセッション)で共有するLRUキャッシュ
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+# キャッシュに保存する値のおおよそのメモリ使用量(バイト)
+def sizeof(value):
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+
+    def __init__(self, max_bytes, ttl_seconds=None, sizeof=sizeof):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        # key -> (値, サイズ, 有効期限)
+        self._entries = OrderedDict()
+        # 取得中のキー -> threading.Event (同じキーの同時取得を1回にまとめる)
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, size, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            self.current_bytes -= size
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            # 上限より大きい値はキャッシュしない
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size, expires_at)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self.current_bytes -= entry[1]
+            return entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    # キャッシュにあればそれを返し、なければ loader() の結果を保存して返す
+    # 複数のセッションが同時に同じキーを要求しても loader() は1回しか呼ばれない
+    def get_or_load(self, key, loader):
+        while True:
+            with self._lock:
+                found, value = self._lookup(key)
+                if found:
+                    self.hits += 1
+                    return value
+                event = self._loading.get(key)
+                if event is None:
+                    self.misses += 1
+                    event = self._loading[key] = threading.Event()
+                    break
+            event.wait()
+
+        try:
+            value = loader()
+            self.put(key, value)
+            return value
+        finally:
+            with self._lock:
+                del self._loading[key]
+            event.set()
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / requests if requests else 0.0,
+            }
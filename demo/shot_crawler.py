@@ -0,0 +1,187 @@
+# リーグ単位で全選手のシュートデータをまとめてローカルに保存するコード
+# Understatに負荷をかけないよう同時接続数とリクエストの間隔を制限し、
+# 進捗を保存しておくことで途中で止まっても続きから再開できるようにする
+# 進捗の保存先: data/shot_store/_crawl/season=<シーズン>.json
+# refresh_matches() は前回以降に終わった試合のシュートだけを取得し、保存済みの選手のデータに追加する
+
+import datetime
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from demo.shot_store import (LEAGUES, STORE_DIR, _atomic_write, fetch_league_matches, fetch_league_players, fetch_match_shots,
+                             fetch_player_shots, merge_player_shots, save_player_shots)
+from demo.shot_table import to_shot_table
+
+
+class RateLimiter:
+    # 全スレッドを合わせて1秒あたり rate 回までに抑える
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+def checkpoint_path(season):
+    return STORE_DIR / "_crawl" / f"season={season}.json"
+
+
+def new_checkpoint(season):
+    return {"season": str(season), "started_at": time.time(), "leagues": [], "players": {}, "done": [], "failed": {}}
+
+
+def read_checkpoint(season):
+    try:
+        with open(checkpoint_path(season), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return new_checkpoint(season)
+
+
+def write_checkpoint(checkpoint):
+    text = json.dumps(checkpoint, ensure_ascii=False)
+    _atomic_write(checkpoint_path(checkpoint["season"]), lambda p: p.write_text(text, encoding="utf-8"))
+
+
+# 失敗した場合は間隔を空けて retries 回まで再試行する
+def with_retries(func, limiter, retries=3, backoff=2.0):
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            return func()
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+# 選手の一覧を取得して checkpoint["players"] に保存する(取得済みのリーグは取得し直さない)
+def list_players(checkpoint, leagues, limiter, log=print):
+    for league in leagues:
+        if league in checkpoint["leagues"]:
+            continue
+        players = with_retries(lambda: fetch_league_players(league, checkpoint["season"]), limiter)
+        for player in players:
+            # シーズン途中に移籍した選手は複数のリーグに出てくるので1回だけ取得する
+            checkpoint["players"].setdefault(str(player["id"]), {"name": player.get("player_name", ""), "league": league})
+        checkpoint["leagues"].append(league)
+        write_checkpoint(checkpoint)
+        log(f"{league}: {len(players)} 人")
+
+
+def crawl(season, leagues=LEAGUES, max_workers=4, rate=2.0, restart=False, checkpoint_every=10, log=print):
+    checkpoint = new_checkpoint(season) if restart else read_checkpoint(season)
+    limiter = RateLimiter(rate)
+    list_players(checkpoint, leagues, limiter, log)
+
+    done = set(checkpoint["done"])
+    todo = [player_id for player_id, player in checkpoint["players"].items() if player["league"] in leagues and player_id not in done]
+    log(f"{len(done)} 人は取得済み、残り {len(todo)} 人を取得します")
+
+    def fetch(player_id):
+        df = to_shot_table(with_retries(lambda: fetch_player_shots(player_id), limiter))
+        save_player_shots(player_id, df)
+        return len(df)
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {pool.submit(fetch, player_id): player_id for player_id in todo}
+    try:
+        for i, future in enumerate(as_completed(futures), 1):
+            player_id = futures[future]
+            name = checkpoint["players"][player_id]["name"]
+            try:
+                shots = future.result()
+            except Exception as e:
+                checkpoint["failed"][player_id] = str(e)
+                log(f"[{i}/{len(todo)}] {player_id} {name}: 失敗 {e}")
+            else:
+                checkpoint["done"].append(player_id)
+                checkpoint["failed"].pop(player_id, None)
+                log(f"[{i}/{len(todo)}] {player_id} {name}: {shots} 本")
+            if i % checkpoint_every == 0:
+                write_checkpoint(checkpoint)
+    finally:
+        # 中断された場合も、そこまでの進捗を保存してから終了する
+        pool.shutdown(wait=True, cancel_futures=True)
+        write_checkpoint(checkpoint)
+    return checkpoint
+
+
+def sync_path(season):
+    return STORE_DIR / "_crawl" / f"season={season}.matches.json"
+
+
+def read_synced_matches(season):
+    try:
+        with open(sync_path(season), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_synced_matches(season, synced):
+    text = json.dumps(synced, ensure_ascii=False)
+    _atomic_write(sync_path(season), lambda p: p.write_text(text, encoding="utf-8"))
+
+
+# Understat の試合日時(UTC)を UNIX 時刻に変換する
+def match_time(match):
+    return datetime.datetime.strptime(match["datetime"], "%Y-%m-%d %H:%M:%S").replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+# 前回の更新以降に終わった試合のシュートだけを取得し、試合に出た選手の保存済みデータに追加する
+# 選手の全シーズンを取得し直さないため、週1回の更新では数試合分のデータしか扱わない
+def refresh_matches(season, leagues=LEAGUES, max_workers=4, rate=2.0, log=print):
+    season = str(season)
+    limiter = RateLimiter(rate)
+    synced = read_synced_matches(season)
+    # 全選手を取得した時点で終わっていた試合は保存済みなので取得しない(1日の余裕を持たせる)
+    crawled_at = read_checkpoint(season).get("started_at")
+
+    todo = []
+    for league in leagues:
+        matches = with_retries(lambda: fetch_league_matches(league, season), limiter)
+        done = set(synced.setdefault(league, []))
+        if not done and crawled_at is not None:
+            done = {str(m["id"]) for m in matches if m.get("isResult") and match_time(m) < crawled_at - 24 * 60 * 60}
+            synced[league] = sorted(done)
+        new = [str(m["id"]) for m in matches if m.get("isResult") and str(m["id"]) not in done]
+        todo += [(league, match_id) for match_id in new]
+        log(f"{league}: 新しい試合 {len(new)} 件")
+
+    def fetch(match_id):
+        return with_retries(lambda: fetch_match_shots(match_id), limiter)
+
+    added = 0
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {pool.submit(fetch, match_id): (league, match_id) for league, match_id in todo}
+    try:
+        for i, future in enumerate(as_completed(futures), 1):
+            league, match_id = futures[future]
+            try:
+                df = future.result()
+            except Exception as e:
+                log(f"[{i}/{len(todo)}] 試合 {match_id}: 失敗 {e}")
+                continue
+            if "season" not in df.columns:
+                df["season"] = season
+            df = to_shot_table(df)
+            # 同じ選手のファイルを複数のスレッドから書き換えないよう、追加はこのスレッドで行う
+            shots = sum(merge_player_shots(player_id, df_player, partial=True) for player_id, df_player in df.groupby("player_id"))
+            added += shots
+            synced[league].append(match_id)
+            log(f"[{i}/{len(todo)}] 試合 {match_id}: {shots} 本追加")
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        write_synced_matches(season, synced)
+    return added
@@ -0,0 +1,114 @@
+# 選手のシュートデータを取得するコード
+# メモリ上のキャッシュ → ローカルの保存データ → Understat の順に参照する
+
+import os
+
+from demo.shot_cache import LRUCache
+from demo.shot_store import current_season, load_player_shots, normalize_player_id
+from demo.timing import timed
+
+# 選手IDごとの全シーズンのシュートデータ(プロセス内の全セッションで共有)
+player_cache = LRUCache(
+    max_bytes=int(os.environ.get("PLAYER_CACHE_MB", 256)) * 1024 * 1024,
+    ttl_seconds=int(os.environ.get("PLAYER_CACHE_TTL_SECONDS", 30 * 60)),
+)
+
+# アップロードされたファイルを読み込んだ表(ファイルの中身のハッシュごと)
+# Streamlit は操作のたびにスクリプトを再実行するため、同じファイルを読み込み直さないようにする
+upload_cache = LRUCache(
+    max_bytes=int(os.environ.get("UPLOAD_CACHE_MB", 64)) * 1024 * 1024,
+    ttl_seconds=int(os.environ.get("UPLOAD_CACHE_TTL_SECONDS", 30 * 60)),
+)
+
+# 比較モードで一度に比較できる選手の数
+MAX_COMPARE_PLAYERS = 8
+
+
+# キャッシュ内のデータは全セッションで共有しているため、呼び出し側で値を書き換えないこと
+# (データは取得時に型を変換済みなので、描画のために列を変換したりコピーしたりする必要はない)
+# 終了したシーズンだけが必要な場合は、そのシーズンの分だけを (選手ID, シーズン) をキーにしてキャッシュする
+# (保存済みのデータが古くても終了したシーズンはUnderstatから取得し直さない)
+def get_player_shots(player_id, season=None):
+    player_id = normalize_player_id(player_id)
+    finished = season is not None and str(season) < current_season()
+    with timed("fetch", player_id=player_id, cache="hit") as info:
+        def load():
+            from demo.player_directory import check_player_id
+
+            info["cache"] = "miss"
+            # 名簿にない選手IDはUnderstatに問い合わせずにエラーにする
+            check_player_id(player_id)
+            return load_player_shots(player_id, season if finished else None)
+
+        if finished:
+            return player_cache.get_or_load((player_id, str(season)), load).copy(deep=False)
+        df = player_cache.get_or_load(player_id, load)
+    if season is None:
+        return df.copy(deep=False)
+    return filter_season(df, season)
+
+
+# 全シーズンのデータから1シーズン分を取り出す(すでに読み込んだ全シーズンのデータを使い、読み込み直さない)
+def filter_season(df, season):
+    with timed("filter"):
+        return df[df["season"] == str(season)].reset_index(drop=True)
+
+
+# 選手のシーズンごとの集計値(保存時に計算したものを読むだけで、シュートデータは集計し直さない)
+def get_player_summary(player_id):
+    from demo.shot_store import read_summary
+    from demo.shot_summary import season_stats
+
+    player_id = normalize_player_id(player_id)
+    with timed("summary"):
+        summary = read_summary(player_id)
+        if summary is None:
+            # 保存されていない(保存に失敗した)場合はシュートデータから集計する
+            summary = season_stats(get_player_shots(player_id))
+    return summary
+
+
+# アップロードされたファイル(CSV・Parquet)のシュートデータ
+# get_player_shots と同じく、呼び出し側で値を書き換えないこと
+def get_uploaded_shots(uploaded_file):
+    import hashlib
+
+    from demo.shot_table import read_shot_file
+
+    data = uploaded_file.getvalue()
+    key = hashlib.blake2b(data, digest_size=16).hexdigest()
+    with timed("read_upload", bytes=len(data), cache="hit") as info:
+        def load():
+            info["cache"] = "miss"
+            return read_shot_file(data)
+
+        return upload_cache.get_or_load(key, load)
+
+
+# 比較モードの1選手分のデータを読み込む(ファイルがアップロードされていればそちらを優先)
+def load_comparison_player(uploaded_file, player_id, season, default_name):
+    if uploaded_file:
+        df = get_uploaded_shots(uploaded_file)
+        name = df["player"].iloc[0] if not df.empty else default_name
+        season = df["season"].iloc[0] if not df.empty else "Unknown"
+    else:
+        df = get_player_shots(player_id, season)
+        name = df["player"].iloc[0] if not df.empty else default_name
+    return df, name, season
+
+
+# 引数なしの関数のリストをスレッドで並列に実行する
+# 結果は jobs と同じ順で (戻り値, 例外) のリストとして返す
+def run_concurrently(jobs, max_workers=None):
+    import contextvars
+    from concurrent.futures import ThreadPoolExecutor
+
+    # 処理時間の計測(demo/timing.py)を各スレッドに引き継ぐ
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs)) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, job) for job in jobs]
+
+    results = []
+    for future in futures:
+        error = future.exception()
+        results.append((None if error else future.result(), error))
+    return results
@@ -0,0 +1,74 @@
+# シュートをゾーンごとに集計してヒートマップとして表示するためのコード
+# シュートの数によらず描画するのはゾーンの数だけなので、チーム・リーグ単位の大量のシュートでも描画時間が変わらない
+#
+# 座標は描画と同じハーフピッチ(Opta座標の X: 50-100, Y: 0-100)で、配列は [X方向, Y方向] の順
+
+import numpy as np
+
+# ゾーンごとの集計に使う分割数(X方向, Y方向)
+ZONE_BINS = (10, 12)
+# なめらかに表示する場合は細かく分割してからぼかす
+SMOOTH_BINS = (50, 60)
+SMOOTH_SIGMA = 2.0
+
+X_RANGE = (50, 100)
+Y_RANGE = (0, 100)
+
+# 表示できる値(ゾーンごとのシュート数・ゴール数・ゴール期待値の合計・シュート1本あたりのゴール期待値)
+METRICS = ["count", "goals", "xG", "xG_per_shot"]
+
+
+# 全シュートのゾーンを一度だけ計算し、同じゾーン番号で各値を集計する
+# ハーフピッチの外(自陣)のシュートは含めない
+def bin_shots(x, y, xg, goal, bins=ZONE_BINS):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    nx, ny = bins
+    ix = np.floor((x - X_RANGE[0]) / (X_RANGE[1] - X_RANGE[0]) * nx).astype(int)
+    iy = np.floor((y - Y_RANGE[0]) / (Y_RANGE[1] - Y_RANGE[0]) * ny).astype(int)
+    # 端ちょうど(X=100 など)は最後のゾーンに含める
+    ix[x == X_RANGE[1]] = nx - 1
+    iy[y == Y_RANGE[1]] = ny - 1
+    inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+    zone = ix[inside] * ny + iy[inside]
+
+    # シュートが1本もない場合、weights を指定しても bincount は整数の配列を返すので float にそろえる
+    grids = {
+        "count": np.bincount(zone, minlength=nx * ny).astype(float),
+        "goals": np.bincount(zone, weights=np.asarray(goal, dtype=float)[inside], minlength=nx * ny).astype(float),
+        "xG": np.bincount(zone, weights=np.asarray(xg, dtype=float)[inside], minlength=nx * ny).astype(float),
+    }
+    grids = {name: grid.reshape(nx, ny) for name, grid in grids.items()}
+    grids["xG_per_shot"] = per_shot(grids["xG"], grids["count"])
+    return grids
+
+
+def per_shot(xg, count):
+    return np.divide(xg, count, out=np.zeros_like(xg, dtype=float), where=count > 0)
+
+
+# ガウスぼかし(縦横に分けて1次元の畳み込みを行う)
+def smooth(grid, sigma=SMOOTH_SIGMA):
+    radius = int(3 * sigma)
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-offsets ** 2 / (2 * sigma ** 2))
+    kernel /= kernel.sum()
+    for axis in (0, 1):
+        padded = np.pad(grid, [(radius, radius) if a == axis else (0, 0) for a in (0, 1)])
+        length = grid.shape[axis]
+        grid = sum(w * np.take(padded, np.arange(i, i + length), axis=axis) for i, w in enumerate(kernel))
+    return grid
+
+
+# 表示する値の2次元配列を返す(なめらかに表示する場合は、合計をぼかしてから1本あたりの値を計算する)
+def density_grid(x, y, xg, goal, metric, smoothed=False):
+    if metric not in METRICS:
+        raise ValueError(f"metric は {', '.join(METRICS)} のいずれかを指定してください: '{metric}'")
+    if not smoothed:
+        return bin_shots(x, y, xg, goal)[metric]
+    grids = bin_shots(x, y, xg, goal, SMOOTH_BINS)
+    if metric == "xG_per_shot":
+        count = smooth(grids["count"])
+        # シュートがほとんどないゾーンの値は不安定なので表示しない
+        return np.where(count >= .05, per_shot(smooth(grids["xG"]), count), 0)
+    return smooth(grids[metric])
@@ -0,0 +1,165 @@
+# 複数の選手・シーズンのシュートデータをまとめて1つのファイルに出力するコード
+# 選手ごとにデータを読み込んではすぐに書き出すため、全選手分の表を一度にメモリに持たない
+# Parquet と Arrow IPC は列ごとに圧縮して書き出すので、同じデータのCSVより大幅に小さくなる
+# データはCSVファイルとして保存する場合と同じUnderstatの形(座標は0-1)で出力する
+# 出力するのはローカルに保存済みのデータだけ(Understatには接続しない)
+#
+# 使い方:
+#   with open("shots.parquet", "wb") as f:
+#       rows, failed = export_shots(["1234", "5678"], ["2023", "2024"], "parquet", f)
+#   data, rows, failed = export_bytes(["1234", "5678"], ["2023", "2024"], "parquet")
+
+import os
+import tempfile
+
+import pyarrow as pa
+
+from demo.shot_table import CATEGORY_COLUMNS, FLOAT_COLUMNS, INT_COLUMNS, to_understat_format
+
+# 出力できる形式(拡張子・MIMEタイプ)
+EXPORT_FORMATS = {
+    "parquet": {"label": "Parquet", "extension": ".parquet", "mime": "application/vnd.apache.parquet"},
+    "arrow": {"label": "Arrow IPC", "extension": ".arrow", "mime": "application/vnd.apache.arrow.file"},
+    "csv": {"label": "CSV", "extension": ".csv", "mime": "text/csv"},
+}
+
+# 一度に出力できる選手の数
+MAX_EXPORT_PLAYERS = int(os.environ.get("MAX_EXPORT_PLAYERS", 1000))
+
+
+# 全選手で同じ型になるよう列の型を決めておく(カテゴリ型の列は選手ごとに値の種類が違うため文字列にする)
+def export_schema(columns):
+    fields = []
+    for column in columns:
+        if column in FLOAT_COLUMNS:
+            fields.append(pa.field(column, pa.float32()))
+        elif column in INT_COLUMNS:
+            fields.append(pa.field(column, pa.from_numpy_dtype(INT_COLUMNS[column])))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+def to_arrow(df, schema):
+    df = to_understat_format(df).reindex(columns=schema.names)
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns and df[column].dtype.name == "category":
+            df[column] = df[column].astype(object)
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+class CsvChunkWriter:
+    # CSVファイルとして保存する場合と同じ形で、1つ目の表だけ列名を付けて書き出す
+
+    def __init__(self, sink, schema):
+        self.sink = sink
+        self.columns = schema.names
+        self.header = True
+
+    def write(self, df):
+        text = to_understat_format(df).reindex(columns=self.columns).to_csv(index=False, header=self.header)
+        self.sink.write(text.encode("utf-8"))
+        self.header = False
+
+    def close(self):
+        pass
+
+
+class ArrowChunkWriter:
+
+    def __init__(self, writer, schema):
+        self.writer = writer
+        self.schema = schema
+
+    def write(self, df):
+        self.writer.write_table(to_arrow(df, self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def open_writer(fmt, sink, schema):
+    if fmt == "csv":
+        return CsvChunkWriter(sink, schema)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return ArrowChunkWriter(pq.ParquetWriter(sink, schema, compression="zstd"), schema)
+    if fmt == "arrow":
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        return ArrowChunkWriter(pa.ipc.new_file(sink, schema, options=options), schema)
+    raise ValueError(f"出力形式は {', '.join(EXPORT_FORMATS)} のいずれかを指定してください: '{fmt}'")
+
+
+# 表を1つずつ受け取って sink に書き出し、書き出した行数を返す(列は最初の表に合わせる)
+def write_shots(frames, fmt, sink):
+    writer = None
+    rows = 0
+    try:
+        for df in frames:
+            if df.empty:
+                continue
+            if writer is None:
+                writer = open_writer(fmt, sink, export_schema(df.columns))
+            writer.write(df)
+            rows += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+# 選手ごとに指定したシーズンの保存済みのシュートデータを読み込む
+# Understatには接続せず選手データのキャッシュにも入れない(保存されていない・読み込めない選手は failed に記録して飛ばす)
+def iter_player_shots(player_ids, seasons, failed):
+    from demo.shot_store import normalize_player_id, read_meta, read_player_shots
+
+    seasons = {str(season) for season in seasons}
+    for player_id in player_ids:
+        try:
+            player_id = normalize_player_id(player_id)
+            meta = read_meta(player_id)
+            if meta is None:
+                failed[player_id] = "保存されていません"
+                continue
+            if seasons:
+                meta = dict(meta, seasons=[s for s in meta["seasons"] if s in seasons])
+            df = read_player_shots(player_id, meta=meta)
+        except Exception as e:
+            failed[player_id] = str(e)
+            continue
+        yield df
+
+
+# 選手・シーズンのシュートデータを sink に書き出し、(書き出した行数, 取得に失敗した選手) を返す
+def export_shots(player_ids, seasons, fmt, sink):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"出力形式は {', '.join(EXPORT_FORMATS)} のいずれかを指定してください: '{fmt}'")
+    if len(player_ids) > MAX_EXPORT_PLAYERS:
+        raise ValueError(f"一度に出力できるのは {MAX_EXPORT_PLAYERS} 人までです: {len(player_ids)} 人")
+    failed = {}
+    rows = write_shots(iter_player_shots(player_ids, seasons, failed), fmt, sink)
+    return rows, failed
+
+
+# export_shots() で出力したファイルの中身を (ファイルの中身, 書き出した行数, 失敗した選手) で返す
+# 出力中は一時ファイルに書き出し、出力途中のデータをメモリに溜めない
+def export_bytes(player_ids, seasons, fmt):
+    with tempfile.TemporaryFile() as f:
+        rows, failed = export_shots(player_ids, seasons, fmt, f)
+        f.seek(0)
+        return f.read(), rows, failed
+
+
+# 改行・カンマ・空白で区切った選手IDの一覧(重複は除く)
+def parse_player_ids(text):
+    return list(dict.fromkeys(text.replace(",", " ").replace("、", " ").split()))
+
+
+# 保存済みのデータのうち、リーグ・シーズンに当てはまる選手の選手ID(seasons が空なら全シーズン)
+def league_player_ids(index, leagues, seasons):
+    player_ids = index.table["player_id"].to_numpy()
+    found = []
+    for league in leagues:
+        for season in seasons or [None]:
+            found.extend(player_ids[index.positions(league=league, season=season)])
+    return list(dict.fromkeys(found))
@@ -0,0 +1,453 @@
+# シュートマップを描画するコード
+# 選手によらず共通の部分(ピッチ・凡例・項目名)は一度だけ描画して画像として使い回し、
+# 選手名・シュート・数値など選手ごとに変わる部分だけを毎回描画する
+
+import io
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from matplotlib import font_manager
+from matplotlib.artist import Artist
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.figure import Figure
+from mplsoccer import VerticalPitch
+from PIL import Image
+
+from demo.image_cache import content_key, get_or_render
+from demo.shot_density import X_RANGE, Y_RANGE, density_grid
+from demo.shot_summary import add_metrics
+from demo.timing import timed
+
+# スタイル設定
+BACKGROUND_COLOR = "#0C0D0E"
+FONT_PATH = Path(__file__).parent / "fonts" / "NotoSansJP-Regular.otf"
+
+# 描画内容を変更したら上げる(保存済みの画像を使わないようにするため)
+RENDER_VERSION = 4
+
+# 描画プロセスごとに保持する背景の数(3選手以上の図の背景は1枚で数十MBになるため上限を設ける)
+TEMPLATE_CACHE_SIZE = int(os.environ.get("TEMPLATE_CACHE_SIZE", 8))
+
+# 端末ごとの描画設定(背景はこの解像度で用意するため、保存・表示も必ずこの dpi で行う)
+# grid_columns: 3選手以上を比較するときに横に並べる数 / grid_dpi: そのときの解像度(図が大きくなるため下げる)
+# format: 画像の形式(IMAGE_FORMATS) / svg: SVGファイルのダウンロードを用意するか
+# st.image は幅 1460px を超える画像を縮小して変換し直すため、1選手分の図(幅 8.2 インチ)はそれ以下に収める
+# スマートフォンの画面にはこれ以上細かくても表示しきれないので、モバイルは解像度を下げて256色のPNGにする
+RENDER_PROFILES = {
+    "mobile": {"dpi": 120, "grid_columns": 2, "grid_dpi": 85, "format": "png8", "svg": False},
+    "desktop": {"dpi": 175, "grid_columns": 4, "grid_dpi": 100, "format": "png", "svg": True},
+}
+
+# 画像の形式(png8: 256色に減色したPNG、svg: 拡大しても劣化しないベクター形式)
+# st.image は PNG・JPEG 以外(WebPなど)を受け取るとサーバー側でPNGかJPEGに変換し直すため、表示用はPNGにする
+IMAGE_FORMATS = {
+    "png": {"extension": "png", "mime": "image/png"},
+    "png8": {"extension": "png", "mime": "image/png"},
+    "svg": {"extension": "svg", "mime": "image/svg+xml"},
+}
+
+LABELS = {
+    "ja": {
+        "season_title": "{season} シーズンのリーグ戦でのシュートスタッツ",
+        "xg_small": "ゴール期待値(小)",
+        "xg_large": "ゴール期待値(大)",
+        "goal": "ゴール",
+        "no_goal": "ノーゴール",
+        "average_distance": "平均シュート距離\n{distance:.1f} M",
+        # (項目名, 項目名のx座標, 数値のx座標)
+        "stats": [("シュート数", .05, .11), ("ゴール数", .28, .33), ("ゴール期待値", .48, .54), ("シュート効率", .75, .82)],
+        # キャリアの集計表の列名
+        "career_columns": {"total_shots": "シュート数", "total_goals": "ゴール数", "total_xG": "ゴール期待値", "xG_per_shot": "シュート効率", "actual_average_distance": "平均シュート距離(M)"},
+        "career_total": "通算",
+        # 表示方法("shots" 以外はゾーンごとに集計したヒートマップ)
+        "views": {"shots": "シュートごと", "count": "ゾーンごとのシュート数", "goals": "ゾーンごとのゴール数", "xG": "ゾーンごとのゴール期待値", "xG_per_shot": "ゾーンごとのシュート効率"},
+        "density_low": "少",
+        "density_high": "多",
+        "density_max": "{view} (最大 {value})",
+    },
+    "en": {
+        "season_title": "All shots in League {season}",
+        "xg_small": "Low Quality Chance",
+        "xg_large": "High Quality Chance",
+        "goal": "Goal",
+        "no_goal": "No Goal",
+        "average_distance": "Average Distance\n{distance:.1f} M",
+        "stats": [("Shots", .15, .185), ("Goals", .35, .385), ("xG", .56, .555), ("xG/Shot", .7, .74)],
+        "career_columns": {"total_shots": "Shots", "total_goals": "Goals", "total_xG": "xG", "xG_per_shot": "xG/Shot", "actual_average_distance": "Average Distance (M)"},
+        "career_total": "Total",
+        "views": {"shots": "Shots", "count": "Shots per Zone", "goals": "Goals per Zone", "xG": "xG per Zone", "xG_per_shot": "xG/Shot per Zone"},
+        "density_low": "Low",
+        "density_high": "High",
+        "density_max": "{view} (Max {value})",
+    },
+}
+
+# 各パネルの位置は元の 8x12 インチの図での割合で指定する
+SINGLE_PANEL = {
+    "title": [0, .7, 1, .2], "pitch": [.05, .25, .9, .5], "stats": [0, .2, 1, .05],
+    "name_y": .9, "season_y": .75, "size_legend_y": .53, "result_legend_y": .3,
+    "stats_label_y": .5, "stats_value_y": 0, "invert": False,
+}
+
+# 比較モードの下側の選手は上下を反転して表示する
+LOWER_PANEL = {
+    "title": [0, -.35, 1, .2], "pitch": [.05, -.2, .9, .5], "stats": [0, 0, 1, .05],
+    "name_y": .1, "season_y": .25, "size_legend_y": .53, "result_legend_y": .73,
+    "stats_label_y": 3, "stats_value_y": 2.5, "invert": True,
+}
+
+DESIGN_SIZE = (8, 12)
+
+# window: 元の図で bbox_inches="tight" が切り取っていた範囲(インチ, 余白0.1を含む)
+LAYOUTS = {
+    "single": {
+        "window": (-.1, 2.26, 8.1, 10.9),
+        "panels": [SINGLE_PANEL],
+    },
+    "compare": {
+        "window": (-.1, -4.3, 8.1, 10.9),
+        "panels": [dict(SINGLE_PANEL, stats_label_y=4, stats_value_y=3.5), LOWER_PANEL],
+    },
+}
+
+
+# 3選手以上の比較: 1選手分の図(single)を columns 列ずつ並べる
+# offset: 各パネルを元の図からずらす量(インチ)
+@lru_cache(maxsize=None)
+def grid_layout(count, columns):
+    x0, y0, x1, y1 = LAYOUTS["single"]["window"]
+    width, height = x1 - x0, y1 - y0
+    rows = -(-count // columns)
+    return {
+        "window": (x0, y1 - rows * height, x0 + columns * width, y1),
+        "panels": [dict(SINGLE_PANEL, offset=(i % columns * width, -(i // columns) * height)) for i in range(count)],
+        "grid": True,
+    }
+
+
+# "single", "compare" か、grid_layout を表す "grid_{選手数}_{列数}"
+def get_layout(layout_name):
+    if layout_name in LAYOUTS:
+        return LAYOUTS[layout_name]
+    match = re.fullmatch(r"grid_(\d+)_(\d+)", layout_name)
+    if match is None:
+        raise KeyError(f"レイアウトがありません: {layout_name}")
+    return grid_layout(int(match[1]), int(match[2]))
+
+
+# 比較する選手の数に合ったレイアウト名(2選手なら上下に向かい合わせ、3選手以上は並べる)
+def comparison_layout(count, profile="desktop"):
+    if count == 2:
+        return "compare"
+    return f"grid_{count}_{min(count, RENDER_PROFILES[profile]['grid_columns'])}"
+
+
+@lru_cache(maxsize=None)
+def font_prop():
+    return font_manager.FontProperties(fname=str(FONT_PATH))
+
+
+@lru_cache(maxsize=None)
+def density_cmap():
+    cmap = LinearSegmentedColormap.from_list("shot_density", [BACKGROUND_COLOR, "#7A0B0B", "red", "#FFD2D2"])
+    # シュートのないゾーンは塗らずにピッチを見せる
+    cmap.set_bad(alpha=0)
+    return cmap
+
+
+# ゾーンごとの値の表示形式
+DENSITY_FORMATS = {"count": "{:.0f}", "goals": "{:.0f}", "xG": "{:.1f}", "xG_per_shot": "{:.2f}"}
+
+
+@lru_cache(maxsize=None)
+def make_pitch():
+    return VerticalPitch(pitch_type='opta', half=True, pitch_color=BACKGROUND_COLOR, pad_bottom=.5, line_color='white', linewidth=.75, axis=True, label=True)
+
+
+def figure_size(layout):
+    x0, y0, x1, y1 = layout["window"]
+    return x1 - x0, y1 - y0
+
+
+# 元の図での割合 [left, bottom, width, height] を切り取り後の図での割合に変換する
+def to_figure_rect(layout, rect, offset=(0, 0)):
+    x0, y0, _, _ = layout["window"]
+    width, height = figure_size(layout)
+    left, bottom, w, h = rect
+    dx, dy = offset
+    return [(left * DESIGN_SIZE[0] + dx - x0) / width, (bottom * DESIGN_SIZE[1] + dy - y0) / height, w * DESIGN_SIZE[0] / width, h * DESIGN_SIZE[1] / height]
+
+
+# パネル内の割合の座標 (x, y) を図全体での割合に変換する
+def to_figure_point(layout, rect, x, y, offset=(0, 0)):
+    left, bottom, width, height = to_figure_rect(layout, rect, offset)
+    return left + x * width, bottom + y * height
+
+
+# ピッチのAxesのデータ座標を図全体での割合に変換する(配列でも可)
+def pitch_to_figure(pitch_axes, x, y):
+    (left, bottom, width, height), (x0, x1), (y0, y1) = pitch_axes
+    return left + (x - x0) / (x1 - x0) * width, bottom + (y - y0) / (y1 - y0) * height
+
+
+def new_figure(layout, profile):
+    dpi = RENDER_PROFILES[profile]["grid_dpi" if layout.get("grid") else "dpi"]
+    fig = Figure(figsize=figure_size(layout), dpi=dpi)
+    fig.patch.set_facecolor(BACKGROUND_COLOR)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def add_blank_axes(fig, rect, xlim=(0, 1), ylim=(0, 1)):
+    ax = fig.add_axes(rect)
+    ax.set_xlim(*xlim)
+    ax.set_ylim(*ylim)
+    ax.axis("off")
+    return ax
+
+
+# 保存しておいた背景のピクセルを描画中のキャンバスにそのまま書き込む
+# (ピッチの線や凡例を描き直さず、画像の拡大縮小もしないので速い)
+class TemplateBackground(Artist):
+
+    def __init__(self, region):
+        super().__init__()
+        self.region = region
+        self.set_zorder(-1)
+
+    def draw(self, renderer):
+        renderer.restore_region(self.region)
+
+
+# 選手によらず共通の背景(ピッチ・凡例・項目名)を描画し、ピッチのAxesのリストを返す
+# density: ヒートマップ用(シュートの大きさ・結果の凡例の代わりに色の凡例を描く)
+def draw_background(fig, layout, lang="ja", density=False):
+    labels = LABELS[lang]
+    prop = font_prop()
+
+    pitch = make_pitch()
+    pitch_axes = []
+    for panel in layout["panels"]:
+        offset = panel.get("offset", (0, 0))
+        ax_title = add_blank_axes(fig, to_figure_rect(layout, panel["title"], offset))
+        y = panel["size_legend_y"]
+        if density:
+            ax_title.text(.33, y - .03, labels["density_low"], fontsize=12, fontproperties=prop, fontweight='bold', color='white', ha='right')
+            ax_title.text(.67, y - .03, labels["density_high"], fontsize=12, fontproperties=prop, fontweight='bold', color='white', ha='left')
+            ax_title.imshow(np.linspace(0, 1, 256)[None, :], cmap=density_cmap(), extent=(.35, .65, y - .04, y + .04), aspect="auto")
+        else:
+            ax_title.text(.2, y - .03, labels["xg_small"], fontsize=12, fontproperties=prop, fontweight='bold', color='white', ha='center')
+            ax_title.text(.8, y - .03, labels["xg_large"], fontsize=12, fontproperties=prop, fontweight='bold', color='white', ha='center')
+            ax_title.scatter([.37, .42, .48, .54, .6], [y] * 5, s=[100, 200, 300, 400, 500], color=BACKGROUND_COLOR, edgecolor='white', linewidth=.8)
+            y = panel["result_legend_y"]
+            ax_title.text(.45, y - .03, labels["goal"], fontsize=10, fontproperties=prop, color='white', ha='right')
+            ax_title.scatter(.47, y, s=100, color='red', edgecolor='white', linewidth=.8, alpha=.7)
+            ax_title.scatter(.53, y, s=100, color=BACKGROUND_COLOR, edgecolor='white', linewidth=.8)
+            ax_title.text(.55, y - .03, labels["no_goal"], fontsize=10, fontproperties=prop, color='white', ha='left')
+
+        ax_pitch = fig.add_axes(to_figure_rect(layout, panel["pitch"], offset))
+        pitch.draw(ax=ax_pitch)
+        ax_pitch.axis("off")
+        if panel["invert"]:
+            ax_pitch.invert_yaxis()
+        pitch_axes.append(ax_pitch)
+
+        ax_stats = add_blank_axes(fig, to_figure_rect(layout, panel["stats"], offset))
+        for label, label_x, _ in labels["stats"]:
+            ax_stats.text(label_x, panel["stats_label_y"], label, fontsize=20, fontproperties=prop, fontweight='bold', color='white', ha='left')
+    return pitch_axes
+
+
+# ピッチのAxesのアスペクト比の調整後の実際の位置と表示範囲
+def pitch_axes_bounds(pitch_axes):
+    for ax in pitch_axes:
+        ax.apply_aspect()
+    return [(ax.get_position().bounds, ax.get_xlim(), ax.get_ylim()) for ax in pitch_axes]
+
+
+# 背景を一度だけ描画し、ピクセルのまま保存しておく
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def get_template(layout_name, profile="desktop", lang="ja", density=False):
+    layout = get_layout(layout_name)
+    fig = new_figure(layout, profile)
+    pitch_axes = draw_background(fig, layout, lang, density)
+    fig.canvas.draw()
+    return {
+        "background": fig.canvas.copy_from_bbox(fig.bbox),
+        "pitch_axes": pitch_axes_bounds(pitch_axes),
+    }
+
+
+# よく使う1選手・2選手のシュートの図の背景だけを先に用意しておく(起動時のバックグラウンド処理と描画プロセスの起動時に呼ぶ)
+# 3選手以上の図とゾーン表示の背景は大きく使う頻度も低いので、最初に使う時に用意する
+def warm_templates(lang="ja"):
+    for layout_name in LAYOUTS:
+        for profile in RENDER_PROFILES:
+            get_template(layout_name, profile, lang)
+
+
+# X, Y はOpta座標(0-100), xG は数値に変換済みのデータから集計する
+def shot_stats(df):
+    total_shots = df.shape[0]
+    total_goals = int((df["result"] == "Goal").sum())
+    total_xG = df["xG"].sum()
+    return {
+        "total_shots": total_shots,
+        "total_goals": total_goals,
+        "total_xG": total_xG,
+        "xG_per_shot": total_xG / total_shots if total_shots > 0 else 0,
+        "points_average_distance": df["X"].mean(),
+        "actual_average_distance": (120 - (df["X"] * 1.2).mean()) * 0.9144,
+    }
+
+
+# キャリアモードで表示する表(シーズンごとの行と通算の行)
+# summary: demo/shot_summary.py の summary_frame で作ったシーズンごとの集計値
+def career_table(summary, lang="ja"):
+    labels = LABELS[lang]
+    columns = list(labels["career_columns"])
+    total = add_metrics(summary[["total_shots", "total_goals", "total_xG", "total_X"]].sum().to_frame(labels["career_total"]).T)
+    table = pd.concat([summary[columns], total[columns]]).astype({"total_shots": int, "total_goals": int})
+    return table.round({"total_xG": 2, "xG_per_shot": 2, "actual_average_distance": 1}).rename(columns=labels["career_columns"])
+
+
+# players: (データ, 選手名, シーズン) のリスト(レイアウトのパネルと同じ数)
+# パネルごとにAxesを作らず、全パネルのシュートを図全体を覆う1つのAxesにまとめて描画する
+# view: "shots" ならシュートごとの円、それ以外(demo/shot_density.py の METRICS)はゾーンごとのヒートマップ
+# smooth: ヒートマップをなめらかに表示する
+# vector: 保存しておいた背景のピクセルを使わず背景も描画する(SVGなどのベクター形式で保存する場合)
+def draw_shot_map(layout_name, players, profile="desktop", lang="ja", view="shots", smooth=False, vector=False):
+    layout = get_layout(layout_name)
+    labels = LABELS[lang]
+    prop = font_prop()
+    density = view != "shots"
+
+    fig = new_figure(layout, profile)
+    if vector:
+        template = {"pitch_axes": pitch_axes_bounds(draw_background(fig, layout, lang, density))}
+    else:
+        template = get_template(layout_name, profile, lang, density)
+        fig.add_artist(TemplateBackground(template["background"]))
+    ax = add_blank_axes(fig, [0, 0, 1, 1])
+
+    shot_x, shot_y, shot_sizes, shot_colors = [], [], [], []
+    distance_x, distance_y, line_x, line_y = [], [], [], []
+    grids = []
+    for panel, (df, name, season), pitch_axes in zip(layout["panels"], players, template["pitch_axes"]):
+        stats = shot_stats(df)
+        offset = panel.get("offset", (0, 0))
+
+        # 文字はAxesを作らず図に直接書く
+        fig.text(*to_figure_point(layout, panel["title"], .5, panel["name_y"], offset), name, fontsize=20, fontproperties=prop, fontweight='bold', color='white', ha='center')
+        fig.text(*to_figure_point(layout, panel["title"], .5, panel["season_y"], offset), labels["season_title"].format(season=season), fontsize=14, fontproperties=prop, fontweight='bold', color='white', ha='center')
+
+        # 縦向きのピッチなので、Axesの横軸がY・縦軸がX
+        distance = stats["points_average_distance"]
+        x, y = pitch_to_figure(pitch_axes, 90, distance)
+        distance_x.append(x)
+        distance_y.append(y)
+        line_x += [x, x, np.nan]
+        line_y += [pitch_to_figure(pitch_axes, 90, 100)[1], y, np.nan]
+        fig.text(*pitch_to_figure(pitch_axes, 90, distance - 4), labels["average_distance"].format(distance=stats["actual_average_distance"]), fontsize=10, fontproperties=prop, color='white', ha='center')
+
+        X, Y = df['X'].to_numpy(dtype=float), df['Y'].to_numpy(dtype=float)
+        if density:
+            grids.append(density_grid(X, Y, df['xG'].to_numpy(dtype=float), df['result'].to_numpy() == 'Goal', view, smooth))
+        else:
+            # ピッチの外(自陣など)のシュートは元の図と同じく表示しない
+            (_, _, ylim) = pitch_axes
+            inside = (X >= min(ylim)) & (X <= max(ylim))
+            x, y = pitch_to_figure(pitch_axes, Y[inside], X[inside])
+            shot_x.append(x)
+            shot_y.append(y)
+            shot_sizes.append(300 * df['xG'].to_numpy(dtype=float)[inside])
+            shot_colors.append(np.where(df['result'].to_numpy()[inside] == 'Goal', 'red', BACKGROUND_COLOR))
+
+        values = [f'{stats["total_shots"]}', f'{stats["total_goals"]}', f'{stats["total_xG"]:.2f}', f'{stats["xG_per_shot"]:.2f}']
+        for (_, _, value_x), value in zip(labels["stats"], values):
+            fig.text(*to_figure_point(layout, panel["stats"], value_x, panel["stats_value_y"], offset), value, fontsize=16, fontproperties=prop, color='red', ha='left')
+
+    if density:
+        draw_density(fig, ax, layout, grids, template["pitch_axes"], labels, view, smooth)
+    ax.scatter(distance_x, distance_y, s=100, color='white', linewidth=.8)
+    if not density:
+        # 全選手のシュートを1回のscatterでまとめて描画
+        ax.scatter(np.concatenate(shot_x), np.concatenate(shot_y), s=np.concatenate(shot_sizes), c=np.concatenate(shot_colors), alpha=0.7, linewidth=0.8, edgecolor='white')
+    ax.plot(line_x, line_y, color='white', linewidth=2)
+    return fig
+
+
+# ゾーンごとの値を1パネルにつき1枚の画像として描画する(選手間で比べられるよう色の範囲は全パネルで揃える)
+def draw_density(fig, ax, layout, grids, pitch_axes_list, labels, view, smooth):
+    prop = font_prop()
+    value_format = DENSITY_FORMATS[view]
+    vmax = max(grid.max() for grid in grids) or 1
+    for panel, grid, pitch_axes in zip(layout["panels"], grids, pitch_axes_list):
+        # 縦向きのピッチなので、画像の横方向がY・縦方向がX
+        left, bottom = pitch_to_figure(pitch_axes, Y_RANGE[0], X_RANGE[0])
+        right, top = pitch_to_figure(pitch_axes, Y_RANGE[1], X_RANGE[1])
+        ax.imshow(np.ma.masked_less_equal(grid, 0), cmap=density_cmap(), vmin=0, vmax=vmax, extent=(left, right, bottom, top), origin="lower", aspect="auto", alpha=.85, interpolation="bilinear" if smooth else "nearest")
+
+        if not smooth:
+            # ゾーンの中心に値を書く
+            nx, ny = grid.shape
+            ix, iy = np.nonzero(grid)
+            xs, ys = pitch_to_figure(pitch_axes, Y_RANGE[0] + (iy + .5) * (Y_RANGE[1] - Y_RANGE[0]) / ny, X_RANGE[0] + (ix + .5) * (X_RANGE[1] - X_RANGE[0]) / nx)
+            for x, y, value in zip(xs, ys, grid[ix, iy]):
+                ax.text(x, y, value_format.format(value), fontsize=7, fontproperties=prop, color='white', ha='center', va='center')
+
+        offset = panel.get("offset", (0, 0))
+        fig.text(*to_figure_point(layout, panel["title"], .5, panel["result_legend_y"] - .03, offset), labels["density_max"].format(view=labels["views"][view], value=value_format.format(vmax)), fontsize=10, fontproperties=prop, color='white', ha='center')
+
+
+# 図を1回だけ描画して fmt(IMAGE_FORMATS)の形式のバイト列を返し、描画後は図を必ず解放する
+def render_image(fig, fmt="png"):
+    try:
+        buf = io.BytesIO()
+        if fmt == "svg":
+            fig.savefig(buf, format="svg", facecolor=fig.get_facecolor())
+            return buf.getvalue()
+        fig.canvas.draw()
+        # 背景は不透明なので透明度のチャンネルは保存しない
+        image = Image.frombuffer("RGBA", fig.canvas.get_width_height(), fig.canvas.buffer_rgba(), "raw", "RGBA", 0, 1).convert("RGB")
+        if fmt == "png8":
+            # 色数の少ない図なので、256色に減らしても見た目はほとんど変わらずファイルは数分の1になる
+            # (なめらかなヒートマップのグラデーションに段差が出にくい方法で色を選ぶ)
+            image = image.quantize(256, method=Image.Quantize.MAXCOVERAGE)
+        elif fmt != "png":
+            raise ValueError(f"画像の形式は {', '.join(IMAGE_FORMATS)} のいずれかを指定してください: '{fmt}'")
+        image.save(buf, format="png", dpi=(fig.dpi, fig.dpi))
+        return buf.getvalue()
+    finally:
+        fig.clear()
+        # Agg の描画バッファは図との循環参照に残るため、GCを待たずに手放す
+        fig.canvas.__dict__.pop("renderer", None)
+
+
+# 描画に使う値と描画設定が同じなら、保存済みの画像をそのまま返す
+def shot_map_key(layout_name, players, profile, lang, view="shots", smooth=False, fmt="png"):
+    settings = (RENDER_VERSION, layout_name, profile, lang, view, smooth, fmt, [(str(name), str(season)) for _, name, season in players])
+    arrays = []
+    for df, _, _ in players:
+        arrays += [df["X"].to_numpy(dtype=float), df["Y"].to_numpy(dtype=float), df["xG"].to_numpy(dtype=float), df["result"].to_numpy() == "Goal"]
+    return content_key(settings, arrays)
+
+
+# 描画は描画専用のプロセスで行う(demo/render_pool.py)
+# fmt: 画像の形式(省略した場合は端末ごとの形式 RENDER_PROFILES[profile]["format"])
+def shot_map_image(layout_name, players, profile="desktop", lang="ja", view="shots", smooth=False, fmt=None):
+    from demo.render_pool import render_shot_map
+
+    fmt = fmt or RENDER_PROFILES[profile]["format"]
+    with timed("render", layout=layout_name, view=view, format=fmt, cache="hit") as info:
+        def render():
+            info["cache"] = "miss"
+            return render_shot_map(layout_name, players, profile, lang, view=view, smooth=smooth, fmt=fmt)
+
+        key = shot_map_key(layout_name, players, profile, lang, view, smooth, fmt)
+        return get_or_render(key, render, ext=IMAGE_FORMATS[fmt]["extension"])
@@ -0,0 +1,313 @@
+# Understatから取得したシュートデータをローカルに保存するコード
+# 保存先: data/shot_store/player_id=<選手ID>/season=<シーズン>/shots.parquet
+# 選手・シーズンごとの集計値(demo/shot_summary.py)は保存時に計算して meta.json に書いておく
+
+import datetime
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from demo.shot_summary import rows_to_frame, summarize_shots, summary_frame, summary_rows
+from demo.shot_table import SHOT_TABLE_VERSION, compact, to_shot_table
+from demo.timing import timed
+from demo.understat_client import understat_client
+
+# 保存先のディレクトリ(環境変数 SHOT_STORE_DIR で変更可能)
+STORE_DIR = Path(os.environ.get("SHOT_STORE_DIR", Path(__file__).parent.parent / "data" / "shot_store"))
+
+# 進行中のシーズンのデータを再取得するまでの秒数
+MAX_AGE_SECONDS = 6 * 60 * 60
+
+# Understatのリーグ名(ヨーロッパの5大リーグ)
+LEAGUES = ["EPL", "La_Liga", "Bundesliga", "Serie_A", "Ligue_1"]
+
+
+# 進行中のシーズン(Understatでは 2024-25 シーズンを "2024" と表記)
+def current_season():
+    return season_of(datetime.date.today())
+
+
+# その日に進行中だったシーズン
+def season_of(date):
+    return str(date.year if date.month >= 7 else date.year - 1)
+
+
+def normalize_player_id(player_id):
+    player_id = str(player_id).strip()
+    if not player_id.isdigit():
+        raise ValueError(f"選手IDは数字で入力してください: '{player_id}'")
+    return player_id
+
+
+def player_dir(player_id):
+    return STORE_DIR / f"player_id={player_id}"
+
+
+def season_path(player_id, season):
+    return player_dir(player_id) / f"season={season}" / "shots.parquet"
+
+
+def meta_path(player_id):
+    return player_dir(player_id) / "meta.json"
+
+
+# pyarrow の DataFrame からの変換は複数スレッドから同時に呼ぶと失敗することがあるため、1つずつ行う
+_parquet_lock = threading.Lock()
+
+
+def _write_parquet(df, path):
+    def write(tmp_path):
+        with _parquet_lock:
+            df.to_parquet(tmp_path, index=False)
+
+    _atomic_write(path, write)
+
+
+# 書き込み途中のファイルを読まれないよう、一時ファイルに書いてから置き換える
+def _atomic_write(path, write):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def read_meta(player_id):
+    try:
+        with open(meta_path(player_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+# 保存済みのデータが古いかどうか(取得した時点で終了していたシーズンのデータは変わらないので再取得しない)
+# 取得した時点で進行中・未開始だったシーズンと、保存されていないシーズンは古いとみなす
+def is_stale(meta, season=None):
+    if meta is None:
+        return True
+    if time.time() - meta["fetched_at"] <= MAX_AGE_SECONDS:
+        return False
+    if season is None:
+        return True
+    season = str(season)
+    return season >= season_of(datetime.date.fromtimestamp(meta["fetched_at"])) or season not in meta["seasons"]
+
+
+def fetch_player_shots(player_id):
+    with understat_client() as client:
+        player_data = client.player(player=player_id).get_shot_data()
+    return pd.DataFrame(player_data)
+
+
+# リーグのシーズンに出場した選手の一覧(id, player_name, team_title などの辞書のリスト)
+def fetch_league_players(league, season):
+    if league not in LEAGUES:
+        raise ValueError(f"リーグ名は {', '.join(LEAGUES)} のいずれかを指定してください: '{league}'")
+    with understat_client() as client:
+        return client.league(league=league).get_player_data(season=str(season))
+
+
+# リーグのシーズンの全試合の一覧(id, isResult(試合終了済みか), datetime などの辞書のリスト)
+def fetch_league_matches(league, season):
+    if league not in LEAGUES:
+        raise ValueError(f"リーグ名は {', '.join(LEAGUES)} のいずれかを指定してください: '{league}'")
+    with understat_client() as client:
+        return client.league(league=league).get_match_data(season=str(season))
+
+
+# 1試合の両チームの全シュート(選手のシュートデータと同じ列)
+# fetch_* はUnderstatのデータをそのまま返す(型の変換は呼び出し側で to_shot_table() を使う)
+def fetch_match_shots(match_id):
+    with understat_client() as client:
+        shots = client.match(match=str(match_id)).get_shot_data()
+    return pd.DataFrame(shots["h"] + shots["a"])
+
+
+def write_meta(player_id, seasons, columns, summary):
+    meta = {
+        "player_id": player_id,
+        "fetched_at": time.time(),
+        "seasons": sorted(str(s) for s in seasons),
+        "columns": list(columns),
+        "format": SHOT_TABLE_VERSION,
+        "summary": summary,
+    }
+    _write_meta_file(player_id, meta)
+    return meta
+
+
+def _write_meta_file(player_id, meta):
+    _atomic_write(meta_path(player_id), lambda p: p.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8"))
+
+
+def save_player_shots(player_id, df):
+    player_id = normalize_player_id(player_id)
+    seasons = sorted(df["season"].unique()) if "season" in df.columns else []
+    for season in seasons:
+        df_season = df[df["season"] == season]
+        _write_parquet(df_season, season_path(player_id, season))
+    return write_meta(player_id, seasons, df.columns, summarize_shots(df))
+
+
+# 同じ選手の保存データを同時に書き換えないよう、選手ごとにロックする
+_player_locks = {}
+_player_locks_lock = threading.Lock()
+
+
+def _player_lock(player_id):
+    with _player_locks_lock:
+        return _player_locks.setdefault(player_id, threading.Lock())
+
+
+# 保存済みのデータに、まだ保存されていないシュート(id で判定)だけを追加する
+# 新しいシュートがあったシーズンのファイルだけを書き直し、追加したシュートの数を返す
+# 書き直したシーズンの集計値は書き込んだ表から計算し直す(他のシーズンの集計値はそのまま)
+# partial=True: df は選手の一部のシュート(試合単位の更新)なので、未保存の選手には何もせず取得時刻も更新しない
+def merge_player_shots(player_id, df, partial=False):
+    player_id = normalize_player_id(player_id)
+    with _player_lock(player_id):
+        return _merge_player_shots(player_id, df, partial)
+
+
+def _merge_player_shots(player_id, df, partial):
+    meta = read_meta(player_id)
+    if meta is None:
+        if partial:
+            return 0
+        save_player_shots(player_id, df)
+        return len(df)
+
+    if meta.get("format") != SHOT_TABLE_VERSION:
+        # 型を変換する前の形式で保存されている場合は、全シーズンを今の形式で保存し直す
+        stored = read_player_shots(player_id, meta=meta)
+        merged = compact(pd.concat([stored, df], ignore_index=True)).drop_duplicates("id", ignore_index=True) if not stored.empty else df
+        save_player_shots(player_id, merged)
+        return len(merged) - len(stored)
+
+    seasons = set(meta["seasons"])
+    added = 0
+    touched = {}
+    if not df.empty:
+        for season, df_new in df.groupby("season", sort=False, observed=True):
+            season = str(season)
+            path = season_path(player_id, season)
+            stored = None
+            # meta.json より後に他のプロセスが書いたファイルも上書きしないよう、ファイルの有無で判定する
+            if path.exists():
+                stored_ids = pd.read_parquet(path, columns=["id"])["id"]
+                df_new = df_new[~df_new["id"].isin(stored_ids)]
+                if df_new.empty:
+                    continue
+                stored = pd.read_parquet(path)
+            df_season = df_new if stored is None else compact(pd.concat([stored, df_new], ignore_index=True))
+            _write_parquet(df_season, path)
+            added += len(df_new)
+            touched.update(summarize_shots(df_season))
+            seasons.add(season)
+
+    # 他のプロセスが先に meta.json を書き換えていても、その内容を古い内容で戻さないよう読み直す
+    meta = read_meta(player_id) or meta
+    seasons |= set(meta["seasons"])
+    summary = meta.get("summary")
+    if summary is None:
+        # 集計値を保存する前のデータは、保存済みの全シュートから集計し直す
+        summary = summarize_shots(read_player_shots(player_id, meta=dict(meta, seasons=sorted(seasons))))
+    else:
+        summary = dict(summary, **touched)
+
+    if not partial:
+        write_meta(player_id, seasons, meta["columns"] or df.columns, summary)
+    elif added or meta.get("summary") is None:
+        _write_meta_file(player_id, dict(meta, seasons=sorted(seasons), columns=meta["columns"] or list(df.columns), summary=summary))
+    return added
+
+
+def read_player_shots(player_id, season=None, meta=None):
+    player_id = normalize_player_id(player_id)
+    meta = meta or read_meta(player_id)
+    if meta is None:
+        raise FileNotFoundError(f"選手ID {player_id} のデータは保存されていません")
+
+    seasons = meta["seasons"] if season is None else [s for s in meta["seasons"] if s == str(season)]
+    frames = [pd.read_parquet(season_path(player_id, s)) for s in seasons]
+    if not frames:
+        return pd.DataFrame(columns=meta["columns"])
+    df = compact(pd.concat(frames, ignore_index=True)) if len(frames) > 1 else frames[0]
+    # 型を変換する前の形式で保存されたデータ
+    if meta.get("format") != SHOT_TABLE_VERSION:
+        df = to_shot_table(df)
+    return df
+
+
+# 選手のシーズンごとの集計値(未保存の選手は None)
+# 集計値を保存する前のデータは、保存済みのシュートから集計して返す(読み込むだけで保存はしない。次に取得した時に保存される)
+def read_summary_dict(player_id, meta=None):
+    player_id = normalize_player_id(player_id)
+    meta = meta or read_meta(player_id)
+    if meta is None:
+        return None
+    summary = meta.get("summary")
+    if summary is None:
+        summary = summarize_shots(read_player_shots(player_id, meta=meta))
+    return summary
+
+
+# 集計値を保存する前のデータに、保存済みのシュートから集計した値を保存する(保存した場合は True)
+def backfill_summary(player_id):
+    player_id = normalize_player_id(player_id)
+    with _player_lock(player_id):
+        meta = read_meta(player_id)
+        if meta is None or meta.get("summary") is not None:
+            return False
+        _write_meta_file(player_id, dict(meta, summary=summarize_shots(read_player_shots(player_id, meta=meta))))
+        return True
+
+
+# 選手のシーズンごとの集計値の表(未保存の選手は None)
+def read_summary(player_id, meta=None):
+    summary = read_summary_dict(player_id, meta)
+    return None if summary is None else summary_frame(summary)
+
+
+# 保存済みの全選手・全シーズンの集計値を1つの表にする(列: season, player, team, 集計値, player_id)
+def summary_table():
+    rows = []
+    for path in STORE_DIR.glob("player_id=*/meta.json"):
+        player_id = path.parent.name.split("=", 1)[1]
+        rows += [dict(row, player_id=player_id) for row in summary_rows(read_summary_dict(player_id) or {})]
+    return rows_to_frame(rows, ["player_id"])
+
+
+# 保存済みのデータを優先して読み込み、未保存または古い場合のみUnderstatから取得する
+# fetch: Understatから取得する関数(省略時は fetch_player_shots。リクエストの間隔を制限する場合などに渡す)
+def load_player_shots(player_id, season=None, fetch=None):
+    player_id = normalize_player_id(player_id)
+    meta = read_meta(player_id)
+    if not is_stale(meta, season):
+        with timed("store_read"):
+            return read_player_shots(player_id, season, meta)
+
+    try:
+        with timed("understat"):
+            data = (fetch or fetch_player_shots)(player_id)
+        with timed("transform"):
+            df = to_shot_table(data)
+    except Exception:
+        # Understatに接続できない場合は古いデータでも保存済みのものを使う
+        if meta is not None:
+            return read_player_shots(player_id, season, meta)
+        raise
+
+    # 新しいシュートがあったシーズンのファイルだけを書き直す
+    with timed("store_write"):
+        merge_player_shots(player_id, df)
+    if season is not None:
+        df = df[df["season"] == str(season)].reset_index(drop=True) if "season" in df.columns else df
+    return df
@@ -0,0 +1,86 @@
+# 選手・シーズンごとの集計値(シュート数・ゴール数・ゴール期待値など)を保存時に計算しておくコード
+# 集計値は合計だけを持つため、新しいシュートが追加されたときは追加分を足すだけで更新できる
+# (平均やシュート1本あたりの値は表示するときに合計から計算する)
+#
+# 集計値の形式(シーズンごと):
+#   {"player": 選手名, "teams": {チーム名: シュート数}, "shots": シュート数, "goals": ゴール数, "xG": ゴール期待値の合計, "X": X座標の合計}
+
+import numpy as np
+import pandas as pd
+
+# 画面に表示する集計値
+SUMMARY_COLUMNS = ["total_shots", "total_goals", "total_xG", "xG_per_shot", "actual_average_distance"]
+
+# 集計値の表の列(この後に add_metrics で計算した列が続く)
+SUMMARY_TABLE_COLUMNS = ["season", "player", "team", "total_shots", "total_goals", "total_xG", "total_X"]
+
+
+# シュートデータ(型を変換済み)をシーズンごとに1回のgroupbyで集計する
+def summarize_shots(df):
+    if df.empty:
+        return {}
+    work = pd.DataFrame({
+        "season": df["season"].astype(str).to_numpy(),
+        "player": df["player"].astype(str).to_numpy() if "player" in df.columns else "",
+        "goal": (df["result"] == "Goal").to_numpy(),
+        "xG": df["xG"].to_numpy(dtype=float),
+        "X": df["X"].to_numpy(dtype=float),
+    })
+    # シュートを打った時点の所属チーム
+    if {"h_a", "h_team", "a_team"} <= set(df.columns):
+        work["team"] = np.where(df["h_a"].to_numpy() == "h", df["h_team"].astype(str).to_numpy(), df["a_team"].astype(str).to_numpy())
+    else:
+        work["team"] = ""
+
+    totals = work.groupby("season").agg(player=("player", "last"), shots=("xG", "size"), goals=("goal", "sum"), xG=("xG", "sum"), X=("X", "sum"))
+    teams = work[work["team"] != ""].groupby(["season", "team"]).size()
+    summary = {}
+    for season, row in totals.iterrows():
+        summary[season] = {
+            "player": row["player"],
+            "teams": {team: int(n) for team, n in teams.get(season, pd.Series(dtype=int)).items()},
+            "shots": int(row["shots"]),
+            "goals": int(row["goals"]),
+            "xG": float(row["xG"]),
+            "X": float(row["X"]),
+        }
+    return summary
+
+
+# 合計から平均などの値を計算する(frame の列: total_shots, total_goals, total_xG, total_X)
+def add_metrics(frame):
+    shots = frame["total_shots"].where(frame["total_shots"] > 0)
+    frame["xG_per_shot"] = (frame["total_xG"] / shots).fillna(0)
+    frame["points_average_distance"] = frame["total_X"] / shots
+    frame["actual_average_distance"] = (120 - frame["points_average_distance"] * 1.2) * 0.9144
+    return frame
+
+
+# 集計値を表の行(辞書)のリストにする
+def summary_rows(summary):
+    return [{
+        "season": season,
+        "player": entry["player"],
+        # 最も多くシュートを打ったチーム(シーズン途中で移籍した場合)
+        "team": max(entry["teams"], key=entry["teams"].get) if entry["teams"] else "",
+        "total_shots": entry["shots"],
+        "total_goals": entry["goals"],
+        "total_xG": entry["xG"],
+        "total_X": entry["X"],
+    } for season, entry in summary.items()]
+
+
+# 行のリストから表を作る(extra_columns: 行に追加した列)
+def rows_to_frame(rows, extra_columns=()):
+    frame = pd.DataFrame(rows, columns=SUMMARY_TABLE_COLUMNS + list(extra_columns))
+    return add_metrics(frame.astype({"total_shots": int, "total_goals": int, "total_xG": float, "total_X": float}))
+
+
+# 集計値をシーズンをインデックスとする表にする
+def summary_frame(summary):
+    return rows_to_frame(summary_rows(summary)).set_index("season").sort_index()
+
+
+# シュートデータから直接シーズンごとの表を作る(保存していないデータ用)
+def season_stats(df):
+    return summary_frame(summarize_shots(df))
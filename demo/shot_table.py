@@ -0,0 +1,111 @@
+# シュートデータの列の型をそろえるコード
+# Understatのデータは全ての値が文字列で届くため、取得時に一度だけ数値・カテゴリ型に変換し、
+# 以降は全てのモードでこの形のまま使う(描画のたびに変換やコピーをしない)
+#   X, Y: Opta座標(0-100)の float32, xG: float32
+#   id, minute, player_id, match_id, h_goals, a_goals: 整数
+#   result, situation, shotType など値の種類が少ない列: カテゴリ
+# CSVとして保存する場合は to_understat_format() でUnderstatと同じ形(座標は0-1)に戻す
+# アップロードされたファイル(CSV・Parquet)は read_shot_file() で列の型を指定して読み込む
+
+import numpy as np
+import pandas as pd
+
+# 保存データの形式(変えた場合は上げる)
+SHOT_TABLE_VERSION = 2
+
+COORDINATE_COLUMNS = ["X", "Y"]
+FLOAT_COLUMNS = ["X", "Y", "xG"]
+INT_COLUMNS = {"id": "int64", "minute": "int16", "player_id": "int32", "match_id": "int32", "h_goals": "int16", "a_goals": "int16"}
+CATEGORY_COLUMNS = ["result", "situation", "shotType", "lastAction", "h_a", "season", "player", "h_team", "a_team", "player_assisted"]
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# アップロードされたファイルに必要な列
+REQUIRED_COLUMNS = ["X", "Y", "xG", "result", "player", "season"]
+
+
+# カテゴリ型の列は結合すると object 型に戻るため、結合後はこれでカテゴリ型にし直す
+def compact(df):
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns and df[column].dtype.name != "category":
+            df[column] = df[column].astype("category")
+    return df
+
+
+# Understat(またはUnderstatの形で保存したCSV)のシュートデータを型付きの表に変換する
+# scale_coordinates=False: 座標がすでにOpta座標(0-100)の場合
+def to_shot_table(data, scale_coordinates=True):
+    df = pd.DataFrame(data)
+    if df.empty:
+        return df
+    table = {}
+    for column in df.columns:
+        values = df[column]
+        if column in FLOAT_COLUMNS:
+            values = pd.to_numeric(values, errors="coerce").astype(np.float32)
+            if column in COORDINATE_COLUMNS and scale_coordinates:
+                values = values * np.float32(100)
+        elif column in INT_COLUMNS:
+            values = pd.to_numeric(values, errors="coerce")
+            dtype = INT_COLUMNS[column]
+            values = values.astype(dtype if values.notna().all() else dtype.capitalize())
+        elif column in CATEGORY_COLUMNS:
+            if values.dtype.name != "category":
+                values = values.where(values.isna(), values.astype(str)).astype("category")
+        elif column == "date":
+            values = pd.to_datetime(values, format=DATE_FORMAT, errors="coerce")
+        table[column] = values
+    return pd.DataFrame(table)
+
+
+# 型付きの表をUnderstatと同じ形(座標は0-1)に戻す(CSVの保存用)
+def to_understat_format(df):
+    df = df.copy()
+    for column in COORDINATE_COLUMNS:
+        if column in df.columns:
+            df[column] = (df[column].astype(float) / 100).round(6)
+    if "xG" in df.columns:
+        df["xG"] = df["xG"].astype(float).round(6)
+    if "date" in df.columns and pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df["date"] = df["date"].dt.strftime(DATE_FORMAT)
+    return df
+
+
+# CSVの列の型(型を推測せずに読み込む。カテゴリ型の列は読み込み時に辞書型にする)
+def csv_column_types():
+    import pyarrow as pa
+
+    types = {column: pa.float32() for column in FLOAT_COLUMNS}
+    types.update({column: pa.int64() for column in INT_COLUMNS})
+    types.update({column: pa.dictionary(pa.int32(), pa.string()) for column in CATEGORY_COLUMNS})
+    types["date"] = pa.string()
+    return types
+
+
+# アップロードされたファイルの中身(CSVまたはParquet)を型付きの表にする
+# 座標はUnderstatの形(0-1)とOpta座標(0-100)のどちらでもよい(全ての座標が1以下ならUnderstatの形とみなす)
+# 必要な列がない・数値の列に数値でない値がある・座標が範囲外の場合は ValueError
+def read_shot_file(data):
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    try:
+        if data[:4] == b"PAR1":
+            table = pq.read_table(pa.BufferReader(data))
+        else:
+            options = pa_csv.ConvertOptions(column_types=csv_column_types(), strings_can_be_null=True)
+            table = pa_csv.read_csv(pa.BufferReader(data), convert_options=options)
+    except pa.ArrowException as e:
+        raise ValueError(f"ファイルを読み込めませんでした: {e}") from e
+    missing = [column for column in REQUIRED_COLUMNS if column not in table.column_names]
+    if missing:
+        raise ValueError(f"ファイルに必要な列がありません: {', '.join(missing)}")
+
+    df = table.to_pandas()
+    coordinates = df[COORDINATE_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    df = to_shot_table(df, scale_coordinates=not coordinates.max().max() > 1)
+    for column in COORDINATE_COLUMNS:
+        values = df[column]
+        if ((values < 0) | (values > 100)).any():
+            raise ValueError(f"座標 {column} の値が範囲外です(0-1 または 0-100): 最小 {values.min():g}, 最大 {values.max():g}")
+    return df
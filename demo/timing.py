@@ -0,0 +1,122 @@
+# 1回の操作(ボタンを押してから画像が表示されるまで)を段階ごとに計測するコード
+# 各段階の処理時間とメモリ使用量の増減を記録し、1行のJSONとしてログに出力する
+# 環境変数 SHOT_MAP_DEBUG=1 か URL に ?debug=1 を付けると、画面に計測結果を表示する
+#
+# 使い方:
+#   timer = start_request("mobile", "スタッツの取得")
+#   with timed("fetch"):
+#       ...
+#   finish_request(timer)
+# 計測中の操作は contextvars で受け渡すため、timed() はどの関数の中からでも呼べる
+# (計測中でなければ何もしない)
+
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger("shot_map.timing")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_current = contextvars.ContextVar("shot_map_request_timer", default=None)
+
+
+# 現在の常駐メモリ(MB)(取得できない環境では None)
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+class RequestTimer:
+
+    def __init__(self, page, mode):
+        self.request_id = uuid.uuid4().hex[:12]
+        self.page = page
+        self.mode = mode
+        self.stages = []
+        self.started = time.perf_counter()
+        self.rss_start = rss_mb()
+        self.total_ms = None
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds, rss_delta_mb=None, **extra):
+        record = {"stage": stage, "ms": round(seconds * 1000, 2), "rss_delta_mb": None if rss_delta_mb is None else round(rss_delta_mb, 2)}
+        record.update(extra)
+        with self._lock:
+            self.stages.append(record)
+
+    def finish(self):
+        self.total_ms = round((time.perf_counter() - self.started) * 1000, 2)
+        rss = rss_mb()
+        return {
+            "event": "request_timing",
+            "request_id": self.request_id,
+            "page": self.page,
+            "mode": self.mode,
+            "total_ms": self.total_ms,
+            "rss_mb": None if rss is None else round(rss, 1),
+            "rss_delta_mb": None if rss is None or self.rss_start is None else round(rss - self.rss_start, 2),
+            "stages": self.stages,
+        }
+
+
+def current_timer():
+    return _current.get()
+
+
+@contextmanager
+def timed(stage, **extra):
+    timer = _current.get()
+    if timer is None:
+        yield extra
+        return
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    try:
+        # 呼び出し側で extra に値を追加できる(キャッシュに当たったかどうかなど)
+        yield extra
+    finally:
+        rss_after = rss_mb()
+        timer.add(stage, time.perf_counter() - start, None if rss_before is None or rss_after is None else rss_after - rss_before, **extra)
+
+
+def start_request(page, mode):
+    timer = RequestTimer(page, mode)
+    _current.set(timer)
+    return timer
+
+
+def debug_enabled():
+    if os.environ.get("SHOT_MAP_DEBUG") == "1":
+        return True
+    import streamlit as st
+    return st.experimental_get_query_params().get("debug", [""])[0] == "1"
+
+
+# ログに出力し、デバッグ表示が有効なら計測結果を表示する
+def finish_request(timer):
+    _current.set(None)
+    if not timer.stages:
+        return
+    record = timer.finish()
+    logger.info(json.dumps(record, ensure_ascii=False))
+
+    if debug_enabled():
+        import streamlit as st
+        with st.expander(f"処理時間の内訳 (合計 {timer.total_ms:.0f} ms)"):
+            st.table(timer.stages)
+            st.caption(f"request_id: {timer.request_id} / メモリ: {record['rss_mb']} MB (増減 {record['rss_delta_mb']} MB)")
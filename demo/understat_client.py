@@ -0,0 +1,149 @@
+# Understatへの接続を切り替えるコード
+# 環境変数 UNDERSTAT_SOURCE で取得元を選ぶ
+#   live   : Understatに接続する(既定)
+#   record : Understatに接続し、返ってきたデータを UNDERSTAT_FIXTURES のファイルに保存する
+#   replay : Understatに接続せず、保存したファイルのデータを返す(オフラインでの動作確認・負荷試験用)
+# replay では UNDERSTAT_LATENCY_MS(応答までの平均ミリ秒)と UNDERSTAT_ERROR_RATE(失敗させる割合)で
+# 実際の通信に近い遅延やエラーを再現できる
+#
+# どのクライアントも understatapi.UnderstatClient と同じ使い方ができる
+#   with understat_client() as client:
+#       client.player(player="8260").get_shot_data()
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+SOURCE = os.environ.get("UNDERSTAT_SOURCE", "live")
+FIXTURE_DIR = Path(os.environ.get("UNDERSTAT_FIXTURES", Path(__file__).parent.parent / "data" / "understat_fixtures"))
+LATENCY_MS = float(os.environ.get("UNDERSTAT_LATENCY_MS", 0))
+ERROR_RATE = float(os.environ.get("UNDERSTAT_ERROR_RATE", 0))
+SEED = os.environ.get("UNDERSTAT_SEED")
+
+
+# endpoint: player, league, match, team / name: 選手IDやリーグ名 / method: get_shot_data など
+def fixture_path(fixture_dir, endpoint, name, method, kwargs):
+    args = "_".join(str(v) for _, v in sorted(kwargs.items()))
+    stem = re.sub(r"[^0-9A-Za-z_-]+", "_", f"{name}_{args}" if args else str(name))
+    return Path(fixture_dir) / endpoint / f"{stem}.{method}.json"
+
+
+class FixtureNotFound(Exception):
+    pass
+
+
+class _Endpoint:
+
+    def __init__(self, client, endpoint, name):
+        self._client = client
+        self._endpoint = endpoint
+        self._name = name
+
+    def __getattr__(self, method):
+        if not method.startswith("get_"):
+            raise AttributeError(method)
+        return lambda **kwargs: self._client._call(self._endpoint, self._name, method, kwargs)
+
+
+class _FixtureClient:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def player(self, player):
+        return _Endpoint(self, "player", player)
+
+    def league(self, league):
+        return _Endpoint(self, "league", league)
+
+    def match(self, match):
+        return _Endpoint(self, "match", match)
+
+    def team(self, team):
+        return _Endpoint(self, "team", team)
+
+
+class ReplayClient(_FixtureClient):
+
+    def __init__(self, fixture_dir=None, latency_ms=None, error_rate=None, seed=None):
+        self.fixture_dir = Path(fixture_dir or FIXTURE_DIR)
+        self.latency_ms = LATENCY_MS if latency_ms is None else latency_ms
+        self.error_rate = ERROR_RATE if error_rate is None else error_rate
+        self._random = random.Random(SEED if seed is None else seed)
+        self._lock = threading.Lock()
+
+    def _call(self, endpoint, name, method, kwargs):
+        with self._lock:
+            # 平均 latency_ms で 0.5〜1.5 倍にばらつかせる
+            delay = self.latency_ms * self._random.uniform(.5, 1.5) / 1000
+            fail = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise ConnectionError(f"Understatへの接続に失敗しました(再現用のエラー): {endpoint}/{name}")
+        path = fixture_path(self.fixture_dir, endpoint, name, method, kwargs)
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise FixtureNotFound(f"保存されたデータがありません: {path}") from None
+
+
+class RecordingClient(_FixtureClient):
+
+    def __init__(self, client, fixture_dir=None):
+        self.client = client
+        self.fixture_dir = Path(fixture_dir or FIXTURE_DIR)
+
+    def __enter__(self):
+        self.client.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self.client.__exit__(*exc)
+
+    def _call(self, endpoint, name, method, kwargs):
+        data = getattr(getattr(self.client, endpoint)(**{endpoint: name}), method)(**kwargs)
+        path = fixture_path(self.fixture_dir, endpoint, name, method, kwargs)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+        return data
+
+
+# replay のクライアントはプロセス内で共有する(乱数の系列を1つにして再現できるようにするため)
+_replay_client = None
+_replay_lock = threading.Lock()
+
+
+def understat_client(source=None):
+    global _replay_client
+    source = source or SOURCE
+    if source == "replay":
+        with _replay_lock:
+            if _replay_client is None:
+                _replay_client = ReplayClient()
+            return _replay_client
+
+    import understatapi
+
+    client = understatapi.UnderstatClient()
+    if source == "record":
+        return RecordingClient(client)
+    if source != "live":
+        raise ValueError(f"UNDERSTAT_SOURCE は live, record, replay のいずれかを指定してください: '{source}'")
+    return client
+
+
+# テストや負荷試験でプロセス内の replay のクライアントを差し替える
+def set_replay_client(client):
+    global _replay_client
+    with _replay_lock:
+        _replay_client = client
@@ -0,0 +1,39 @@
+# 起動直後にバックグラウンドで重いライブラリの読み込みと描画の準備を行うコード
+# app.py では streamlit 以外の重いライブラリ(matplotlib, mplsoccer, understatapi)を読み込まずに最初の画面を表示し、
+# ユーザーが選手IDを入力している間にこちらで読み込んでおく(プロセスごとに1回だけ実行する)
+
+import threading
+import time
+
+_lock = threading.Lock()
+_thread = None
+
+# 各段階にかかった秒数
+timings = {}
+
+
+def _warmup():
+    start = time.perf_counter()
+    from demo import render_pool, shot_map
+    timings["import_shot_map"] = time.perf_counter() - start
+
+    # 描画プロセスを使う場合は各プロセスが起動時に背景を用意する
+    start = time.perf_counter()
+    if render_pool.WORKERS > 0:
+        render_pool.warmup()
+    else:
+        shot_map.warm_templates()
+    timings["render_setup"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    import understatapi
+    timings["import_understatapi"] = time.perf_counter() - start
+
+
+def start_warmup():
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_warmup, name="warmup", daemon=True)
+            _thread.start()
+    return _thread
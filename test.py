@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import understatapi
 from mplsoccer import VerticalPitch
@@ -167,17 +168,18 @@ if uploaded_file is not None:
     ax2.plot([90, 90], [100, points_average_distance], color='white', linewidth=2)
     ax2.text(90, points_average_distance - 4, f'Average Distance\n{actual_average_distance:.1f} M', fontsize=10, fontname='Roboto', color='white', ha='center')
 
-    for x in df.to_dict(orient='records'):
-        pitch.scatter(
-            x['X'],
-            x['Y'],
-            s=300 * x['xG'],
-            color='red' if x['result'] == 'Goal' else background_color,
-            ax=ax2,
-            alpha=0.7,
-            linewidth=0.8,
-            edgecolor='white'
-        )
+    # 全シュートを1回のscatterでまとめて描画
+    shot_colors = np.where(df['result'].to_numpy() == 'Goal', 'red', background_color)
+    pitch.scatter(
+        df['X'].to_numpy(),
+        df['Y'].to_numpy(),
+        s=300 * df['xG'].to_numpy(),
+        c=shot_colors,
+        ax=ax2,
+        alpha=0.7,
+        linewidth=0.8,
+        edgecolor='white'
+    )
 
     ax3 = fig.add_axes([0, .2, 1, .05])
     ax3.set_facecolor(background_color)
@@ -197,12 +199,17 @@ if uploaded_file is not None:
     ax3.text(.7, .5, 'xG/Shot', fontsize=20, fontname='Roboto', fontweight='bold', color='white', ha='left')
     ax3.text(.74, 0, f'{xG_per_shot:.2f}', fontsize=16, fontname='Roboto', color='red', ha='left')
 
+    # 1回だけPNGに変換し、表示とダウンロードに同じ画像を使う(図はすぐに閉じる)
     buf = io.BytesIO()
-    st.pyplot(fig)
-    fig.savefig(buf, format="png", bbox_inches="tight", facecolor=fig.get_facecolor())
+    try:
+        fig.savefig(buf, format="png", bbox_inches="tight", dpi=200, facecolor=fig.get_facecolor())
+    finally:
+        plt.close(fig)
+    png = buf.getvalue()
+    st.image(png, use_column_width=True)
     st.download_button(
         label="画像をダウンロード",
-        data=buf.getvalue(),
+        data=png,
         file_name = f"{player_name.replace(' ', '_')}_{season}.png",
         mime="image/png"
     )
\ No newline at end of file
@@ -0,0 +1,42 @@
+# テスト用の共通の準備(保存先を一時ディレクトリにし、Understatには接続しない)
+
+import pandas as pd
+import pytest
+
+from demo import player_directory, shot_data, shot_store
+
+
+# Understatと同じ形(全ての値が文字列、座標は0-1)のシュートデータ
+def understat_shots(player_id, seasons, per_season=4, first_id=None):
+    first_id = int(player_id) * 10000 if first_id is None else first_id
+    rows = []
+    for s, season in enumerate(seasons):
+        for i in range(per_season):
+            n = s * per_season + i
+            rows.append({
+                "id": str(first_id + n), "minute": str(10 + n), "result": "Goal" if i == 0 else "MissedShots",
+                "X": f"{.8 + i / 100:.2f}", "Y": f"{.4 + i / 100:.2f}", "xG": f"{.1 * (i + 1):.2f}",
+                "player": f"Player {player_id}", "h_a": "h", "player_id": str(player_id), "situation": "OpenPlay",
+                "season": str(season), "shotType": "RightFoot", "match_id": str(1000 + n),
+                "h_team": "A", "a_team": "B", "h_goals": "1", "a_goals": "0",
+                "date": "2020-09-01 15:00:00", "player_assisted": None, "lastAction": "Pass",
+            })
+    return pd.DataFrame(rows)
+
+
+# 保存先を一時ディレクトリにし、Understatへの接続は fetched に記録して understat_shots() を返す
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    fetched = []
+
+    def fetch_player_shots(player_id):
+        fetched.append(player_id)
+        return understat_shots(player_id, ["2019", "2020"])
+
+    monkeypatch.setattr(shot_store, "STORE_DIR", tmp_path)
+    monkeypatch.setattr(shot_store, "fetch_player_shots", fetch_player_shots)
+    monkeypatch.setattr(player_directory, "DIRECTORY_PATH", tmp_path / "_players.json")
+    monkeypatch.setattr(player_directory, "_index", None)
+    shot_data.player_cache.clear()
+    yield fetched
+    shot_data.player_cache.clear()
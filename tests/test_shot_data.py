@@ -0,0 +1,51 @@
+import json
+import time
+
+from demo import shot_store
+from demo.shot_data import filter_season, get_player_shots, player_cache
+
+
+# 取得時刻を hours 時間前にする
+def age_meta(player_id, hours):
+    path = shot_store.meta_path(player_id)
+    meta = json.loads(path.read_text(encoding="utf-8"))
+    meta["fetched_at"] = time.time() - hours * 60 * 60
+    path.write_text(json.dumps(meta), encoding="utf-8")
+
+
+def test_finished_season_is_not_refetched(store):
+    shot_store.load_player_shots("1")
+    assert store == ["1"]
+    age_meta("1", 7)
+
+    df = get_player_shots("1", "2019")
+    assert store == ["1"]
+    assert len(df) == 4
+    assert set(df["season"]) == {"2019"}
+
+
+def test_stale_store_is_refetched_for_all_seasons(store):
+    shot_store.load_player_shots("1")
+    age_meta("1", 7)
+
+    get_player_shots("1")
+    assert store == ["1", "1"]
+
+
+def test_fresh_store_is_not_refetched(store):
+    shot_store.load_player_shots("1")
+
+    assert len(get_player_shots("1")) == 8
+    assert store == ["1"]
+
+
+# キャリアモードでシーズンを切り替える場合は、読み込み済みの全シーズンのデータから取り出す
+def test_filter_season_uses_loaded_frame(store):
+    df = get_player_shots("1")
+    entries = len(player_cache)
+
+    df_season = filter_season(df, 2019)
+    assert len(df_season) == 4
+    assert set(df_season["season"]) == {"2019"}
+    assert len(player_cache) == entries
+    assert store == ["1"]
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from demo.shot_density import METRICS, SMOOTH_BINS, ZONE_BINS, density_grid
+
+
+@pytest.mark.parametrize("metric", METRICS)
+@pytest.mark.parametrize("smoothed", [False, True])
+def test_no_shots(metric, smoothed):
+    grid = density_grid([], [], [], [], metric, smoothed)
+    assert grid.shape == (SMOOTH_BINS if smoothed else ZONE_BINS)
+    assert grid.dtype == float
+    assert not grid.any()
+
+
+# 全てのシュートがハーフピッチの外(自陣)
+@pytest.mark.parametrize("metric", METRICS)
+@pytest.mark.parametrize("smoothed", [False, True])
+def test_all_shots_outside_half_pitch(metric, smoothed):
+    grid = density_grid(np.array([10., 30., 49.9]), np.array([20., 50., 80.]), np.array([.1, .2, .3]), np.array([True, False, False]), metric, smoothed)
+    assert grid.dtype == float
+    assert not grid.any()
+
+
+def test_counts_shots_inside_half_pitch():
+    grids = {metric: density_grid(np.array([100., 95., 30.]), np.array([50., 50., 50.]), np.array([.4, .2, .3]), np.array([True, False, True]), metric) for metric in METRICS}
+    assert grids["count"].sum() == 2
+    assert grids["goals"].sum() == 1
+    assert grids["xG"].sum() == pytest.approx(.6)
+    assert grids["xG_per_shot"].max() == pytest.approx(.3)
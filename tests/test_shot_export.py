@@ -0,0 +1,34 @@
+import io
+
+import pandas as pd
+
+from demo import shot_store
+from demo.shot_data import player_cache
+from demo.shot_export import export_bytes, export_shots
+from tests.conftest import understat_shots
+
+
+def test_export_reads_only_stored_players(store):
+    shot_store.save_player_shots("1", shot_store.to_shot_table(understat_shots("1", ["2019", "2020"])))
+
+    buffer = io.BytesIO()
+    rows, failed = export_shots(["1", "2"], ["2020"], "parquet", buffer)
+
+    assert rows == 4
+    assert list(failed) == ["2"]
+    assert store == []
+    assert len(player_cache) == 0
+    df = pd.read_parquet(io.BytesIO(buffer.getvalue()))
+    assert set(df["season"]) == {"2020"}
+    assert df["X"].max() <= 1
+
+
+def test_export_bytes_all_seasons(store):
+    shot_store.save_player_shots("1", shot_store.to_shot_table(understat_shots("1", ["2019", "2020"])))
+    shot_store.save_player_shots("2", shot_store.to_shot_table(understat_shots("2", ["2020"])))
+
+    data, rows, failed = export_bytes(["1", "2"], [], "csv")
+
+    assert rows == 12
+    assert failed == {}
+    assert len(pd.read_csv(io.BytesIO(data))) == 12
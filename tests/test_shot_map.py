@@ -0,0 +1,16 @@
+import pytest
+
+from demo import shot_map
+
+pytestmark = pytest.mark.skipif(not shot_map.FONT_PATH.exists(), reason="フォントがありません")
+
+
+# 起動時に用意するのは1選手・2選手のシュートの図の背景だけ
+def test_warm_templates_builds_only_single_and_compare():
+    shot_map.get_template.cache_clear()
+    shot_map.warm_templates()
+
+    info = shot_map.get_template.cache_info()
+    assert info.currsize == len(shot_map.LAYOUTS) * len(shot_map.RENDER_PROFILES)
+    assert info.maxsize == shot_map.TEMPLATE_CACHE_SIZE
+    assert info.maxsize >= info.currsize
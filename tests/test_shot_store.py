@@ -0,0 +1,84 @@
+import datetime
+import json
+
+import pandas as pd
+
+from demo import shot_store
+from demo.shot_store import merge_player_shots, read_meta, read_player_shots, save_player_shots, season_path, to_shot_table
+from tests.conftest import understat_shots
+
+
+def stored_ids(player_id, season=None):
+    return sorted(read_player_shots(player_id, season)["id"].tolist())
+
+
+def test_merge_into_unstored_player_saves_everything(store):
+    df = to_shot_table(understat_shots("1", ["2019", "2020"]))
+
+    assert merge_player_shots("1", df) == 8
+    assert stored_ids("1") == sorted(df["id"].tolist())
+    assert read_meta("1")["seasons"] == ["2019", "2020"]
+
+
+def test_merge_adds_only_new_shot_ids(store):
+    save_player_shots("1", to_shot_table(understat_shots("1", ["2020"])))
+    # 保存済みの4本のうち2本と、新しい2本
+    df = to_shot_table(understat_shots("1", ["2020"], first_id=10002))
+
+    assert merge_player_shots("1", df) == 2
+    assert stored_ids("1", "2020") == list(range(10000, 10006))
+
+
+def test_merge_new_season_leaves_other_partitions_untouched(store):
+    save_player_shots("1", to_shot_table(understat_shots("1", ["2019", "2020"])))
+    old_path = season_path("1", "2019")
+    old_mtime = old_path.stat().st_mtime_ns
+    old_shots = pd.read_parquet(old_path)
+
+    df = to_shot_table(understat_shots("1", ["2021"], first_id=20000))
+    assert merge_player_shots("1", df) == 4
+
+    assert old_path.stat().st_mtime_ns == old_mtime
+    pd.testing.assert_frame_equal(pd.read_parquet(old_path), old_shots)
+    assert read_meta("1")["seasons"] == ["2019", "2020", "2021"]
+    assert stored_ids("1", "2021") == list(range(20000, 20004))
+
+
+def test_merge_without_new_shots_rewrites_nothing(store):
+    df = to_shot_table(understat_shots("1", ["2019", "2020"]))
+    save_player_shots("1", df)
+    mtimes = {season: season_path("1", season).stat().st_mtime_ns for season in ["2019", "2020"]}
+
+    assert merge_player_shots("1", df) == 0
+    assert {season: season_path("1", season).stat().st_mtime_ns for season in ["2019", "2020"]} == mtimes
+
+
+def test_partial_merge_skips_unstored_player(store):
+    assert merge_player_shots("1", to_shot_table(understat_shots("1", ["2020"])), partial=True) == 0
+    assert read_meta("1") is None
+    assert not shot_store.player_dir("1").exists()
+
+
+# 取得時刻を date にする
+def set_fetched_at(player_id, date):
+    path = shot_store.meta_path(player_id)
+    meta = json.loads(path.read_text(encoding="utf-8"))
+    meta["fetched_at"] = datetime.datetime(date.year, date.month, date.day).timestamp()
+    path.write_text(json.dumps(meta), encoding="utf-8")
+
+
+def test_season_finished_before_fetch_is_not_refetched(store):
+    shot_store.load_player_shots("1")
+    set_fetched_at("1", datetime.date(2021, 3, 1))
+
+    assert len(shot_store.load_player_shots("1", "2019")) == 4
+    assert store == ["1"]
+
+
+# 取得した時点で進行中・未開始だったシーズンと保存されていないシーズンは、今では終了していても取得し直す
+def test_season_in_progress_later_or_missing_at_fetch_is_refetched(store):
+    shot_store.load_player_shots("1")
+    for season in ["2020", "2022", "2018"]:
+        set_fetched_at("1", datetime.date(2021, 3, 1))
+        shot_store.load_player_shots("1", season)
+    assert store == ["1", "1", "1", "1"]
@@ -0,0 +1,90 @@
+import json
+
+import pandas as pd
+import pytest
+
+from demo import shot_store
+from demo.shot_store import meta_path, merge_player_shots, read_player_shots, read_summary_dict, save_player_shots, to_shot_table
+from demo.shot_summary import summarize_shots
+from tests.conftest import understat_shots
+
+
+def assert_summary_equal(actual, expected):
+    assert sorted(actual) == sorted(expected)
+    for season, row in expected.items():
+        assert actual[season]["player"] == row["player"]
+        assert actual[season]["teams"] == row["teams"]
+        assert actual[season]["shots"] == row["shots"]
+        assert actual[season]["goals"] == row["goals"]
+        assert actual[season]["xG"] == pytest.approx(row["xG"])
+        assert actual[season]["X"] == pytest.approx(row["X"])
+
+
+def test_merged_summary_equals_full_recompute(store):
+    old = to_shot_table(understat_shots("1", ["2019", "2020"]))
+    # 2020 シーズンの続き(アウェーの試合)と新しいシーズン
+    new = to_shot_table(understat_shots("1", ["2020", "2021"], first_id=20000).assign(h_a="a", a_team="C"))
+    save_player_shots("1", old)
+    merge_player_shots("1", new)
+
+    merged = read_summary_dict("1")
+    assert_summary_equal(merged, summarize_shots(pd.concat([old, new], ignore_index=True)))
+    assert merged["2020"]["teams"] == {"A": 4, "C": 4}
+
+
+def test_stored_summary_stays_equal_to_recompute_after_merge(store):
+    save_player_shots("1", to_shot_table(understat_shots("1", ["2019", "2020"])))
+    merge_player_shots("1", to_shot_table(understat_shots("1", ["2020", "2021"], first_id=10006)))
+
+    assert_summary_equal(read_summary_dict("1"), summarize_shots(read_player_shots("1")))
+
+
+# 集計値を保存する前の形式のデータは、集計して返すだけで meta.json は書き換えない
+def test_read_summary_dict_does_not_write(store):
+    df = to_shot_table(understat_shots("1", ["2019", "2020"]))
+    save_player_shots("1", df)
+    path = meta_path("1")
+    meta = json.loads(path.read_text(encoding="utf-8"))
+    del meta["summary"]
+    path.write_text(json.dumps(meta), encoding="utf-8")
+    text, mtime = path.read_text(encoding="utf-8"), path.stat().st_mtime_ns
+
+    assert_summary_equal(read_summary_dict("1"), summarize_shots(df))
+    assert path.read_text(encoding="utf-8") == text
+    assert path.stat().st_mtime_ns == mtime
+
+
+# 他の取得が先に meta.json を更新していた場合(読み込んだ meta.json が古い場合)も、集計値を古い値に戻さない
+def test_merge_with_outdated_meta_keeps_summary(store, monkeypatch):
+    save_player_shots("1", to_shot_table(understat_shots("1", ["2020"])))
+    outdated = shot_store.read_meta("1")
+    new = to_shot_table(understat_shots("1", ["2020"], first_id=10004))
+    merge_player_shots("1", new)
+
+    original = shot_store.read_meta
+    calls = []
+
+    # 1回目だけ、他の取得が書き換える前の meta.json を返す
+    def read_meta(player_id):
+        calls.append(player_id)
+        return outdated if len(calls) == 1 else original(player_id)
+
+    with monkeypatch.context() as m:
+        m.setattr(shot_store, "read_meta", read_meta)
+        assert merge_player_shots("1", new) == 0
+
+    assert read_summary_dict("1")["2020"]["shots"] == 8
+    assert_summary_equal(read_summary_dict("1"), summarize_shots(read_player_shots("1")))
+
+
+def test_backfill_summary_saves_missing_summary(store):
+    df = to_shot_table(understat_shots("1", ["2019", "2020"]))
+    save_player_shots("1", df)
+    path = meta_path("1")
+    meta = json.loads(path.read_text(encoding="utf-8"))
+    del meta["summary"]
+    path.write_text(json.dumps(meta), encoding="utf-8")
+
+    assert shot_store.backfill_summary("1")
+    assert_summary_equal(shot_store.read_meta("1")["summary"], summarize_shots(df))
+    assert not shot_store.backfill_summary("1")
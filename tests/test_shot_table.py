@@ -0,0 +1,41 @@
+import io
+
+import pytest
+
+from demo.shot_table import read_shot_file, to_shot_table
+from tests.conftest import understat_shots
+
+
+def parquet_bytes(df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def test_csv_in_understat_scale():
+    df = read_shot_file(understat_shots("1", ["2020"]).to_csv(index=False).encode("utf-8"))
+    assert df["X"].max() == pytest.approx(83)
+    assert df["Y"].min() == pytest.approx(40)
+
+
+def test_parquet_in_understat_scale():
+    df = read_shot_file(parquet_bytes(understat_shots("1", ["2020"])))
+    assert df["X"].max() == pytest.approx(83)
+
+
+# 保存データと同じ型付きの表(座標は0-100)は100倍しない
+def test_parquet_in_opta_scale():
+    df = read_shot_file(parquet_bytes(to_shot_table(understat_shots("1", ["2020"]))))
+    assert df["X"].max() == pytest.approx(83)
+    assert df["Y"].min() == pytest.approx(40)
+
+
+def test_out_of_range_coordinates_are_rejected():
+    df = to_shot_table(understat_shots("1", ["2020"]))
+    df.loc[0, "X"] = 150
+    with pytest.raises(ValueError, match="X"):
+        read_shot_file(parquet_bytes(df))
+
+    csv = understat_shots("1", ["2020"]).assign(Y="-0.5").to_csv(index=False).encode("utf-8")
+    with pytest.raises(ValueError, match="Y"):
+        read_shot_file(csv)
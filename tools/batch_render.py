@@ -0,0 +1,115 @@
+# 複数の選手のシュートマップをまとめて作成するコード
+# 使い方:
+#   python tools/batch_render.py --players 8260 1250 --season 2024 --out output/maps
+#   python tools/batch_render.py --league EPL --season 2024 --out output/maps --rate 1
+# 保存済みのデータはそのまま使い、Understatへのリクエストは全スレッドを合わせて1秒あたり --rate 回までにする
+# 描画は demo/render_pool.py の描画プロセスで並列に行い、最後に所要時間の集計を表示する
+
+import argparse
+import csv
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from demo import render_pool
+from demo.shot_crawler import RateLimiter, with_retries
+from demo.shot_map import RENDER_PROFILES, shot_map_image
+from demo.shot_store import LEAGUES, current_season, fetch_league_players, fetch_player_shots, load_player_shots, normalize_player_id
+
+
+def file_name(player_id, player_name, season):
+    return f"{player_id}_{re.sub(r'[^0-9A-Za-z_-]+', '_', player_name).strip('_')}_{season}.png"
+
+
+# 1選手分のデータ取得から画像の保存までを行い、所要時間を返す
+# (選手ごとに1回しか読み込まないので、アプリの選手データのキャッシュは使わない)
+def render_player(player_id, season, out_dir, profile, limiter):
+    result = {"player_id": player_id, "player": "", "shots": 0, "fetch_s": 0.0, "render_s": 0.0, "file": "", "error": ""}
+    try:
+        start = time.perf_counter()
+        df = load_player_shots(player_id, season, fetch=lambda player_id: with_retries(lambda: fetch_player_shots(player_id), limiter))
+        result["fetch_s"] = time.perf_counter() - start
+        if df.empty:
+            result["error"] = f"{season} シーズンのシュートデータがありません"
+            return result
+
+        player_name = df["player"].iloc[0]
+
+        start = time.perf_counter()
+        png = shot_map_image("single", [(df, player_name, season)], profile=profile)
+        path = out_dir / file_name(player_id, player_name, season)
+        path.write_bytes(png)
+        result["render_s"] = time.perf_counter() - start
+        result.update(player=player_name, shots=len(df), file=path.name)
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def print_summary(results, elapsed):
+    done = [r for r in results if not r["error"]]
+    print(f"\n作成: {len(done)} 枚 / 失敗・スキップ: {len(results) - len(done)} 件 / 合計 {elapsed:.1f} 秒 ({len(done) / elapsed:.2f} 枚/秒)")
+    for key, label in [("fetch_s", "データ取得"), ("render_s", "描画・保存")]:
+        values = np.array([r[key] for r in done])
+        if values.size:
+            print(f"{label}: 平均 {values.mean():.3f} 秒  中央値 {np.median(values):.3f} 秒  95% {np.percentile(values, 95):.3f} 秒  最大 {values.max():.3f} 秒")
+    for r in results:
+        if r["error"]:
+            print(f"  {r['player_id']}: {r['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="複数の選手のシュートマップをまとめて作成する")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--players", nargs="+", help="選手IDのリスト")
+    target.add_argument("--league", choices=LEAGUES, help="このリーグのシーズンに出場した全選手を対象にする")
+    parser.add_argument("--season", default=current_season())
+    parser.add_argument("--out", type=Path, default=Path("output") / "shot_maps")
+    parser.add_argument("--profile", choices=list(RENDER_PROFILES), default="desktop")
+    parser.add_argument("--jobs", type=int, default=render_pool.MAX_PENDING, help="同時に処理する選手の数")
+    parser.add_argument("--rate", type=float, default=2.0, help="Understatへの1秒あたりのリクエスト数の上限")
+    args = parser.parse_args()
+
+    limiter = RateLimiter(args.rate)
+    if args.league:
+        player_ids = [str(p["id"]) for p in with_retries(lambda: fetch_league_players(args.league, args.season), limiter)]
+    else:
+        try:
+            player_ids = [normalize_player_id(p) for p in args.players]
+        except ValueError as e:
+            parser.error(str(e))
+    player_ids = list(dict.fromkeys(player_ids))
+    args.out.mkdir(parents=True, exist_ok=True)
+    # 描画待ちが上限を超えてタイムアウトしないよう、同時に処理する数は描画の受付数までにする
+    jobs = max(1, min(args.jobs, render_pool.MAX_PENDING))
+    print(f"{len(player_ids)} 人の {args.season} シーズンのシュートマップを作成します (同時 {jobs} 件, 描画プロセス {render_pool.WORKERS})")
+
+    results = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(render_player, player_id, args.season, args.out, args.profile, limiter) for player_id in player_ids]
+        for i, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            status = result["file"] or f"失敗: {result['error']}"
+            print(f"[{i}/{len(player_ids)}] {result['player_id']} {status}")
+    elapsed = time.perf_counter() - start
+    render_pool.shutdown()
+
+    with open(args.out / "timings.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]) if results else ["player_id"])
+        writer.writeheader()
+        writer.writerows(results)
+    print_summary(results, elapsed)
+    if not any(not r["error"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# 選手名で検索するための選手名簿(demo/player_directory.py)を作成するコード
+# 使い方:
+#   python tools/build_player_directory.py --seasons 2014 2015 ... 2024    # Understatから各リーグ・シーズンの選手一覧を取得
+#   python tools/build_player_directory.py --local                         # 保存済みのデータだけから作成(Understatには接続しない)
+# 作成済みの名簿がある場合は、そこに追加する(最初から作り直す場合は --restart)
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from demo.player_directory import DIRECTORY_PATH, add_league_players, add_local_players, read_directory, write_directory
+from demo.shot_store import LEAGUES, current_season
+
+
+def main():
+    parser = argparse.ArgumentParser(description="選手名で検索するための選手名簿を作成する")
+    parser.add_argument("--seasons", nargs="+", default=[current_season()])
+    parser.add_argument("--leagues", nargs="+", choices=LEAGUES, default=LEAGUES)
+    parser.add_argument("--rate", type=float, default=2.0, help="1秒あたりのリクエスト数の上限")
+    parser.add_argument("--local", action="store_true", help="Understatに接続せず保存済みのデータだけを使う")
+    parser.add_argument("--restart", action="store_true", help="作成済みの名簿を使わず最初から作成する")
+    args = parser.parse_args()
+
+    directory = {} if args.restart else read_directory()
+    add_local_players(directory)
+    if not args.local:
+        try:
+            add_league_players(directory, args.seasons, args.leagues, rate=args.rate)
+        except KeyboardInterrupt:
+            print("\n中断しました。ここまでに取得した選手を保存します。")
+    write_directory(directory)
+    print(f"{DIRECTORY_PATH}: 選手 {len(directory)} 人")
+
+
+if __name__ == "__main__":
+    main()
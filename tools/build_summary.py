@@ -0,0 +1,31 @@
+# 保存済みの全選手・全シーズンの集計値を表示・出力するコード
+# 使い方:
+#   python tools/build_summary.py                      # 集計値がまだない選手の分を計算して保存し、件数を表示
+#   python tools/build_summary.py --csv summary.csv    # 全選手・全シーズンの集計値をCSVに出力
+# 集計値は保存時に計算されるため、通常はこのコードを実行する必要はない(集計値を保存する前のデータ用)
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from demo.shot_store import STORE_DIR, backfill_summary, summary_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="選手・シーズンごとの集計値を用意する")
+    parser.add_argument("--csv", type=Path, help="集計値を出力するCSVファイル")
+    args = parser.parse_args()
+
+    saved = sum(backfill_summary(path.parent.name.split("=", 1)[1]) for path in STORE_DIR.glob("player_id=*/meta.json"))
+    print(f"集計値を保存した選手: {saved} 人")
+    table = summary_table()
+    print(f"{STORE_DIR}: 選手 {table['player_id'].nunique()} 人 / {len(table)} シーズン分")
+    if args.csv:
+        table.to_csv(args.csv, index=False)
+        print(f"出力先: {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# 5大リーグの全選手のシュートデータをUnderstatから取得してローカルに保存するコード
+# 使い方:
+#   python tools/crawl_leagues.py --season 2024
+#   python tools/crawl_leagues.py --season 2024 --leagues EPL La_Liga --workers 2 --rate 1
+#   python tools/crawl_leagues.py --season 2024 --refresh
+# 中断しても同じコマンドを実行すれば続きから再開する(最初からやり直す場合は --restart)
+# --refresh は前回以降に終わった試合のシュートだけを取得して保存済みのデータに追加する
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from demo.shot_crawler import crawl, refresh_matches
+from demo.shot_store import LEAGUES, current_season
+
+
+def main():
+    parser = argparse.ArgumentParser(description="リーグ単位で全選手のシュートデータを保存する")
+    parser.add_argument("--season", default=current_season())
+    parser.add_argument("--leagues", nargs="+", choices=LEAGUES, default=LEAGUES)
+    parser.add_argument("--workers", type=int, default=4, help="同時に接続する数")
+    parser.add_argument("--rate", type=float, default=2.0, help="1秒あたりのリクエスト数の上限")
+    parser.add_argument("--restart", action="store_true", help="保存済みの進捗を使わず最初から取得する")
+    parser.add_argument("--refresh", action="store_true", help="新しく終わった試合のシュートだけを追加する")
+    args = parser.parse_args()
+
+    try:
+        if args.refresh:
+            added = refresh_matches(args.season, args.leagues, max_workers=args.workers, rate=args.rate)
+            print(f"{added} 本のシュートを追加しました")
+            return
+        checkpoint = crawl(args.season, args.leagues, max_workers=args.workers, rate=args.rate, restart=args.restart)
+    except KeyboardInterrupt:
+        print("\n中断しました。再度実行すると続きから取得します。")
+        sys.exit(130)
+
+    print(f"取得済み: {len(checkpoint['done'])} 人 / 失敗: {len(checkpoint['failed'])} 人")
+    if checkpoint["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# オフラインでの動作確認・負荷試験用に、Understatの応答をファイルに保存するコード
+# 使い方:
+#   python tools/record_fixtures.py --players 8260 1250                 # Understatから取得して保存
+#   python tools/record_fixtures.py --league EPL --season 2024         # リーグの選手一覧と全選手のデータを保存
+#   python tools/record_fixtures.py --synthetic 50 --shots 400         # 架空の選手のデータを作って保存(通信なし)
+# 保存したデータは UNDERSTAT_SOURCE=replay で使う(保存先は UNDERSTAT_FIXTURES, 既定は data/understat_fixtures)
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from demo.shot_store import LEAGUES, current_season, normalize_player_id
+from demo.understat_client import FIXTURE_DIR, RecordingClient, fixture_path
+
+
+def write_synthetic(count, shots, fixture_dir, first_id=900000):
+    from bench.synthetic import synthetic_shots
+
+    for i in range(count):
+        player_id = first_id + i
+        path = fixture_path(fixture_dir, "player", player_id, "get_shot_data", {})
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(synthetic_shots(shots, player_id=player_id, seed=player_id)), encoding="utf-8")
+    print(f"架空の選手 {count} 人分を保存しました(ID {first_id}〜{first_id + count - 1})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--players", nargs="+")
+    target.add_argument("--league", choices=LEAGUES)
+    target.add_argument("--synthetic", type=int, help="作成する架空の選手の数")
+    parser.add_argument("--season", default=current_season())
+    parser.add_argument("--shots", type=int, default=400, help="架空の選手1人あたりのシュート数")
+    parser.add_argument("--out", type=Path, default=FIXTURE_DIR)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        write_synthetic(args.synthetic, args.shots, args.out)
+        return
+
+    import understatapi
+
+    with RecordingClient(understatapi.UnderstatClient(), args.out) as client:
+        if args.league:
+            players = client.league(league=args.league).get_player_data(season=str(args.season))
+            player_ids = [str(p["id"]) for p in players]
+        else:
+            player_ids = [normalize_player_id(p) for p in args.players]
+        for i, player_id in enumerate(player_ids, 1):
+            shots = client.player(player=player_id).get_shot_data()
+            print(f"[{i}/{len(player_ids)}] {player_id}: {len(shots)} 本")
+    print(f"保存先: {args.out}")
+
+
+if __name__ == "__main__":
+    main()